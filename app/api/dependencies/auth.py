@@ -3,12 +3,14 @@ from typing import Callable, Optional
 from fastapi import Depends, HTTPException, Security
 from fastapi.security import APIKeyHeader
 from starlette import status
+from starlette.requests import Request
 
 from app.api.dependencies.database import get_repository
 from app.core.config import JWT_TOKEN_PREFIX, SECRET_KEY
 from app.db.errors import EntityDoesNotExist
 from app.db.repositories.users import UsersRepository
 from app.models import common
+from app.models.schemas.jwt import JWTUser
 from app.models.users import User
 from app.services import jwt
 
@@ -17,8 +19,19 @@ HEADER_KEY = "Authorization"
 
 def get_current_user_authorizer(
         *,
-        required: bool = True
+        required: bool = True,
+        stateless: bool = False,
 ) -> Callable:  # type: ignore
+    """Dependency resolving the user the request's token belongs to.
+
+    ``stateless`` routes accept a user built from the token claims alone,
+    see ``jwt.get_stateless_user``; use it only where the role, activity
+    and names are all the route needs and staleness of up to
+    STATELESS_AUTH_MAX_AGE_SECONDS is acceptable.
+    """
+    if stateless:
+        return _get_current_user_stateless
+
     return _get_current_user if required else _get_current_user_optional
 
 
@@ -62,20 +75,49 @@ def _get_authorization_header_optional(
     return ""
 
 
-async def _get_current_user(
-    users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
-    token: str = Depends(_get_authorization_header_retriever()),
-) -> User:
+def _get_jwt_user(token: str) -> JWTUser:
     try:
-        jwt_user = jwt.get_jwt_user_from_token(token, str(SECRET_KEY))
+        return jwt.get_jwt_user_from_token(token, str(SECRET_KEY))
     except ValueError:
 
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
         )
 
+
+async def _get_current_user(
+    users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
+    token: str = Depends(_get_authorization_header_retriever()),
+) -> User:
+    return await _get_principal(users_repo, _get_jwt_user(token))
+
+
+async def _get_current_user_stateless(
+    request: Request,
+    token: str = Depends(_get_authorization_header_retriever()),
+) -> User:
+    jwt_user = _get_jwt_user(token)
+
+    user = jwt.get_stateless_user(jwt_user)
+    if user is not None:
+        return user
+
+    # built here rather than injected, so trusted tokens skip resolving
+    # the repository dependency (a threadpool hop) as well
+    users_repo = UsersRepository(request.app.state.db)
+
+    return await _get_principal(users_repo, jwt_user)
+
+
+async def _get_principal(
+    users_repo: UsersRepository,
+    jwt_user: JWTUser,
+) -> User:
     try:
-        return await users_repo.get_user_by_first_last_name(
+        if jwt_user.id is not None:
+            return await users_repo.get_principal_by_id(str(jwt_user.id))
+
+        return await users_repo.get_principal_by_first_last_name(
             first_name=jwt_user.first_name,
             last_name=jwt_user.last_name
         )
@@ -97,9 +139,7 @@ async def _get_current_user_optional(
     return None
 
 
-def verify_admin(
-        current_user: User = Depends(get_current_user_authorizer())
-) -> User:
+def _check_admin(current_user: Optional[User]) -> User:
 
     if not current_user or current_user.role != common.ADMIN_ROLE:
 
@@ -108,3 +148,9 @@ def verify_admin(
         )
 
     return current_user
+
+
+def verify_admin(
+        current_user: User = Depends(get_current_user_authorizer())
+) -> User:
+    return _check_admin(current_user)
@@ -5,6 +5,7 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from starlette.requests import Request
 
 from app.db.repositories.base import BaseRepository
+from app.services.login_times import LastLoginWriter
 
 
 async def _get_connection(
@@ -22,3 +23,7 @@ def get_repository(
         return repo_type(conn)
 
     return _get_repo
+
+
+def get_last_login_writer(request: Request) -> LastLoginWriter:
+    return request.app.state.last_login_writer
@@ -6,7 +6,11 @@ from fastapi.openapi.utils import validation_error_response_definition
 from pydantic import ValidationError
 from starlette.requests import Request
 from starlette.responses import JSONResponse
-from starlette.status import HTTP_422_UNPROCESSABLE_ENTITY
+from starlette.status import (HTTP_422_UNPROCESSABLE_ENTITY,
+                              HTTP_503_SERVICE_UNAVAILABLE)
+
+from app.resources import error_messages
+from app.services.passwords import HashingPoolOverloaded
 
 validation_error_response_definition["properties"] = {
     "errors": {
@@ -29,3 +33,14 @@ async def http_validation_error_handler(
 
 async def http_error_handler(_: Request, exc: HTTPException) -> JSONResponse:
     return JSONResponse({"errors": [exc.detail]}, status_code=exc.status_code)
+
+
+async def http_overloaded_error_handler(
+    _: Request,
+    exc: HashingPoolOverloaded,
+) -> JSONResponse:
+    return JSONResponse(
+        {"errors": [error_messages.SERVICE_OVERLOADED]},
+        status_code=HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"},
+    )
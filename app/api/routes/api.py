@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.routes import authentication, users
+from app.api.routes import authentication, monitoring, users
 
 router = APIRouter()
 
@@ -15,3 +15,9 @@ router.include_router(
     tags=["users"],
     prefix="/user"
 )
+
+router.include_router(
+    monitoring.router,
+    tags=["admin"],
+    prefix="/admin"
+)
@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Body, Depends, HTTPException
 from starlette.status import HTTP_201_CREATED, HTTP_400_BAD_REQUEST
 
-from app.api.dependencies.database import get_repository
+from app.api.dependencies.database import (get_last_login_writer,
+                                           get_repository)
+from app.api.responses import MongoJSONResponse
 from app.core import config
-from app.db.errors import EntityDoesNotExist
+from app.db.errors import EntityAlreadyExists, EntityDoesNotExist
 from app.db.repositories.users import UsersRepository
 from app.models.schemas.users import UserCreate, UserLogin, UserWithToken
 from app.resources import error_messages
-from app.services import jwt
-from app.services.authentication import check_first_last_name_is_taken
+from app.services import jwt, passwords
+from app.services.login_times import LastLoginWriter
 from app.services.users import update_login_time
 
 router = APIRouter()
@@ -23,24 +25,24 @@ router = APIRouter()
 async def register(
     user_create: UserCreate = Body(..., embed=True, alias="user"),
     users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
-) -> UserWithToken:
-    if await check_first_last_name_is_taken(
-            users_repo,
-            user_create.first_name,
-            user_create.last_name
-    ):
+) -> MongoJSONResponse:
+    try:
+        user = await users_repo.create_user(user_create)
+
+    except EntityAlreadyExists as existence_error:
         raise HTTPException(
             status_code=HTTP_400_BAD_REQUEST,
             detail=error_messages.USER_EXIST,
-        )
-
-    user = await users_repo.create_user(user_create)
+        ) from existence_error
 
     token = jwt.create_access_token_for_user(user, str(config.SECRET_KEY))
 
-    return UserWithToken(
-        id=user.id,
-        token=token
+    return MongoJSONResponse(
+        UserWithToken.construct(
+            id=user.id,
+            token=token
+        ),
+        status_code=HTTP_201_CREATED,
     )
 
 
@@ -52,7 +54,8 @@ async def register(
 async def login(
     user_login: UserLogin = Body(..., embed=True, alias="user"),
     users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
-) -> UserWithToken:
+    login_writer: LastLoginWriter = Depends(get_last_login_writer),
+) -> MongoJSONResponse:
 
     wrong_login_error = HTTPException(
         status_code=HTTP_400_BAD_REQUEST,
@@ -68,14 +71,19 @@ async def login(
     except EntityDoesNotExist as existence_error:
         raise wrong_login_error from existence_error
 
-    if not user.check_password(user_login.password):
+    if not await passwords.verify_password(
+            user_login.password,
+            user.hashed_pass,
+    ):
         raise wrong_login_error
 
     token = jwt.create_access_token_for_user(user, str(config.SECRET_KEY))
 
-    await update_login_time(user, users_repo)
+    update_login_time(user, login_writer)
 
-    return UserWithToken(
-        id=user.id,
-        token=token,
+    return MongoJSONResponse(
+        UserWithToken.construct(
+            id=user.id,
+            token=token,
+        ),
     )
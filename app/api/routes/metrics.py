@@ -0,0 +1,54 @@
+from typing import Callable, Dict, Iterable
+
+from fastapi import APIRouter
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from app.core.metrics import render_stats
+from app.core.timing import phase_duration, request_duration
+from app.db.monitoring import command_stats, pool_stats
+from app.db.repositories.users import principal_cache, principal_lookups
+from app.services import jwt
+from app.services.passwords import hashing_pool
+from app.services.revocation import revoked_versions
+
+# starlette appends the utf-8 charset to text types
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+router = APIRouter()
+
+
+def _stats_sources(request: Request) -> Dict[str, Callable[[], dict]]:
+    return {
+        "principal_cache": principal_cache.stats,
+        "principal_lookups": principal_lookups.stats,
+        "verified_token_cache": jwt.verified_tokens.stats,
+        "rejected_token_cache": jwt.rejected_tokens.stats,
+        "issued_token_cache": jwt.issued_tokens.stats,
+        "password_hashing": hashing_pool.stats,
+        "mongo_pool": pool_stats.stats,
+        "last_login_writer": request.app.state.last_login_writer.stats,
+        "revoked_versions": revoked_versions.stats,
+    }
+
+
+def _render(request: Request) -> Iterable[str]:
+    yield from request_duration.render()
+    yield from phase_duration.render()
+    yield from command_stats.render()
+
+    for prefix, stats in _stats_sources(request).items():
+        yield from render_stats(prefix, stats())
+
+
+@router.get(
+    "/metrics",
+    name="metrics",
+    include_in_schema=False,
+    response_class=PlainTextResponse,
+)
+async def metrics(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(
+        "\n".join(_render(request)) + "\n",
+        media_type=PROMETHEUS_CONTENT_TYPE,
+    )
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends
+
+from app.api.dependencies.auth import verify_admin
+from app.api.responses import MongoJSONResponse
+from app.db.monitoring import command_stats, pool_stats
+
+router = APIRouter()
+
+
+@router.get(
+    "/db",
+    name="admin:db-stats",
+    dependencies=[Depends(verify_admin)]
+)
+async def db_stats() -> MongoJSONResponse:
+    """Connection pool counters, per command latency and slow operations.
+
+    Latency percentiles are bucket upper bounds (``*_le_ms``), the same
+    resolution Prometheus gets from ``/metrics``.
+    """
+    return MongoJSONResponse({
+        "pool": pool_stats.stats(),
+        **command_stats.stats(),
+    })
@@ -1,34 +1,63 @@
-from fastapi import APIRouter, Body, Depends, HTTPException
-from starlette.status import HTTP_400_BAD_REQUEST
+from typing import List, Optional
+
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query
+from starlette.responses import Response, StreamingResponse
+from starlette.status import HTTP_304_NOT_MODIFIED, HTTP_400_BAD_REQUEST
 
 from app.api.dependencies.auth import get_current_user_authorizer, verify_admin
 from app.api.dependencies.database import get_repository
+from app.api.responses import MongoJSONResponse, etag_matches, make_etag
 from app.core import config
 from app.db.errors import EntityAlreadyExists
 from app.db.repositories.users import UsersRepository
-from app.models.schemas.users import UserProfile, UserUpdate
+from app.models.schemas.users import (UserBatchUpdate, UserProfile,
+                                      UsersBatchUpdateResult, UserUpdate,
+                                      UsersPage)
 from app.models.users import User
+from app.resources import error_messages
 from app.services import jwt
-from app.services.authentication import check_first_last_name_is_taken
+from app.services.export import MEDIA_TYPES, ExportFormat, export_users
 from app.services.users import (activate_user, deactivate_user,
-                                update_user_by_id)
+                                list_users_page, update_user,
+                                update_user_by_id, update_users_by_id)
 
 router = APIRouter()
 
 
+def _profile_etag(user: User, token: str) -> str:
+    # last_login is written behind and does not bump the version
+    return make_etag(user.id, user.version, user.last_login, token)
+
+
+def _profile_response(user: User, token: str) -> MongoJSONResponse:
+    return MongoJSONResponse(
+        UserProfile.from_user(user, token=token),
+        headers={"ETag": _profile_etag(user, token)},
+    )
+
+
 @router.get(
     "",
     response_model=UserProfile,
-    name="users:get-current-user"
+    name="users:get-current-user",
+    responses={HTTP_304_NOT_MODIFIED: {"description": "Not Modified"}},
 )
 async def get_current_user(
+    if_none_match: Optional[str] = Header(None),
     user: User = Depends(get_current_user_authorizer()),
-) -> UserProfile:
-    token = jwt.create_access_token_for_user(user, str(config.SECRET_KEY))
-    return UserProfile(
-        **user.dict(exclude={'hashed_pass'}),
-        token=token,
-    )
+) -> Response:
+    # the issued token cache makes this a lookup, a token is only minted
+    # when the cached one is due for refresh, which also changes the ETag
+    token = jwt.get_access_token_for_user(user, str(config.SECRET_KEY))
+    etag = _profile_etag(user, token)
+
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag},
+        )
+
+    return _profile_response(user, token)
 
 
 @router.post(
@@ -39,19 +68,16 @@ async def get_current_user(
 async def activate_current_user(
     current_user: User = Depends(get_current_user_authorizer()),
     users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
-) -> UserProfile:
+) -> MongoJSONResponse:
 
     user_updated = await activate_user(current_user, users_repo)
 
-    token = jwt.create_access_token_for_user(
-        current_user,
+    token = jwt.get_access_token_for_user(
+        user_updated,
         str(config.SECRET_KEY)
     )
 
-    return UserProfile(
-        **user_updated.dict(exclude={'hashed_pass'}),
-        token=token,
-    )
+    return _profile_response(user_updated, token)
 
 
 @router.post(
@@ -62,19 +88,16 @@ async def activate_current_user(
 async def deactivate_current_user(
     current_user: User = Depends(get_current_user_authorizer()),
     users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
-) -> UserProfile:
+) -> MongoJSONResponse:
 
     user_updated = await deactivate_user(current_user, users_repo)
 
-    token = jwt.create_access_token_for_user(
-        current_user,
+    token = jwt.get_access_token_for_user(
+        user_updated,
         str(config.SECRET_KEY)
     )
 
-    return UserProfile(
-        **user_updated.dict(exclude={'hashed_pass'}),
-        token=token,
-    )
+    return _profile_response(user_updated, token)
 
 
 @router.put(
@@ -86,29 +109,93 @@ async def update_current_user(
     user_update: UserUpdate = Body(..., embed=True, alias="user"),
     current_user: User = Depends(get_current_user_authorizer()),
     users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
-) -> UserProfile:
-    if (user_update.first_name and
-            user_update.first_name != current_user.first_name):
-
-        if await check_first_last_name_is_taken(
-                users_repo,
-                user_update.first_name,
-                user_update.last_name,
-        ):
-            raise HTTPException(
-                status_code=HTTP_400_BAD_REQUEST,
-            )
-
-    user = await users_repo.update_user(
-        user=current_user,
-        user_update=user_update
+) -> MongoJSONResponse:
+    try:
+        user = await update_user(user_update, current_user, users_repo)
+
+    except EntityAlreadyExists:
+
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+        )
+
+    token = jwt.get_access_token_for_user(user, str(config.SECRET_KEY))
+
+    return _profile_response(user, token)
+
+
+@router.get(
+    "/admin",
+    response_model=UsersPage,
+    name="users:admin-list-users",
+    dependencies=[Depends(verify_admin)]
+)
+async def admin_list_users(
+    limit: int = Query(50, ge=1, le=config.USERS_PAGE_MAX_SIZE),
+    cursor: Optional[str] = None,
+    role: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
+) -> MongoJSONResponse:
+    try:
+        page = await list_users_page(
+            users_repo,
+            limit=limit,
+            cursor=cursor,
+            role=role,
+            is_active=is_active,
+        )
+
+    except ValueError:
+
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=error_messages.INVALID_CURSOR,
+        )
+
+    return MongoJSONResponse(page)
+
+
+@router.get(
+    "/admin/export",
+    name="users:admin-export-users",
+    dependencies=[Depends(verify_admin)],
+    response_class=StreamingResponse,
+)
+async def admin_export_users(
+    export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+    users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
+) -> StreamingResponse:
+    return StreamingResponse(
+        export_users(users_repo, export_format, config.EXPORT_BATCH_SIZE),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": "attachment; filename=users.{0}".format(
+                export_format.value,
+            ),
+        },
     )
 
-    token = jwt.create_access_token_for_user(user, str(config.SECRET_KEY))
 
-    return UserProfile(
-        **user.dict(exclude={'hashed_pass'}),
-        token=token,
+@router.post(
+    "/admin/batch",
+    response_model=UsersBatchUpdateResult,
+    name="users:admin-batch-update-users",
+    dependencies=[Depends(verify_admin)]
+)
+async def admin_batch_update_users(
+    operations: List[UserBatchUpdate] = Body(..., embed=True, alias="users"),
+    users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
+) -> MongoJSONResponse:
+
+    if len(operations) > config.USERS_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=HTTP_400_BAD_REQUEST,
+            detail=error_messages.BATCH_TOO_LARGE,
+        )
+
+    return MongoJSONResponse(
+        await update_users_by_id(operations, users_repo),
     )
 
 
@@ -123,7 +210,7 @@ async def admin_update_user(
     user_update: UserUpdate = Body(..., embed=True, alias="user"),
     current_user: User = Depends(get_current_user_authorizer()),
     users_repo: UsersRepository = Depends(get_repository(UsersRepository)),
-) -> UserProfile:
+) -> MongoJSONResponse:
 
     if user_update.password:
         raise HTTPException(
@@ -141,14 +228,9 @@ async def admin_update_user(
         raise HTTPException(
             status_code=HTTP_400_BAD_REQUEST,
         )
-    token = jwt.create_access_token_for_user(
+    token = jwt.get_access_token_for_user(
         current_user,
         str(config.SECRET_KEY)
     )
 
-    return UserProfile(
-        **updated_user.dict(
-            exclude={'hashed_pass'},
-        ),
-        token=token,
-    )
+    return _profile_response(updated_user, token)
@@ -0,0 +1,55 @@
+"""Stream the users collection as NDJSON or CSV.
+
+Run ``python -m app.cli.export_users --format csv --output users.csv``;
+without ``--output`` the export is written to stdout. Password hashes
+are never exported.
+"""
+import argparse
+import asyncio
+import sys
+from typing import BinaryIO
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import EXPORT_BATCH_SIZE, MONGO_DATABASE, MONGO_URI
+from app.db.repositories.users import UsersRepository
+from app.services.export import ExportFormat, export_users
+
+
+async def run(
+        export_format: ExportFormat,
+        batch_size: int,
+        output: BinaryIO,
+) -> None:
+    client = AsyncIOMotorClient(MONGO_URI)
+
+    try:
+        users_repo = UsersRepository(client[MONGO_DATABASE])
+        async for chunk in export_users(users_repo, export_format, batch_size):
+            output.write(chunk)
+    finally:
+        client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--format",
+        choices=[export_format.value for export_format in ExportFormat],
+        default=ExportFormat.ndjson.value,
+    )
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument("--output", help="file to write, stdout by default")
+    args = parser.parse_args()
+
+    export_format = ExportFormat(args.format)
+
+    if args.output:
+        with open(args.output, "wb") as output:
+            asyncio.run(run(export_format, args.batch_size, output))
+    else:
+        asyncio.run(run(export_format, args.batch_size, sys.stdout.buffer))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Import users in bulk from an NDJSON file.
+
+Run ``python -m app.cli.import_users users.ndjson``. Every line is a
+``UserCreate`` object; imported users are inactive until an admin
+activates them. Progress is checkpointed after every batch so an
+interrupted import resumes where it stopped.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import List
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
+
+from app.core.config import IMPORT_BATCH_SIZE, MONGO_DATABASE, MONGO_URI
+from app.db.indexes import (UniqueIndexMissing, check_unique_indexes,
+                            ensure_indexes)
+from app.db.repositories.users import UsersRepository
+from app.services.importer import (Failure, ImportProgress, Record,
+                                   UsersImporter)
+
+
+def _write_failures(report_path: str, failures: List[Failure]) -> None:
+    with open(report_path, "a") as report:
+        for line_number, reason in failures:
+            report.write(
+                json.dumps({"line": line_number, "reason": reason}) + "\n",
+            )
+
+
+async def _prepare_indexes(db: AsyncIOMotorDatabase) -> None:
+    # conflicts are only detected by the unique index, without it every
+    # duplicate would be inserted and reported as such
+    try:
+        await ensure_indexes(db)
+    except PyMongoError as index_error:
+        print(  # noqa: WPS421
+            "Index creation failed: {0}".format(index_error),
+            file=sys.stderr,
+        )
+
+    await check_unique_indexes(db)
+
+
+async def run(  # noqa: WPS211
+        path: str,
+        batch_size: int,
+        workers: int,
+        checkpoint_path: str,
+        report_path: str,
+) -> ImportProgress:
+    progress = ImportProgress.load(checkpoint_path)
+    resumed_at = progress.line
+    client = AsyncIOMotorClient(MONGO_URI)
+    started_at = time.perf_counter()
+
+    try:
+        await _prepare_indexes(client[MONGO_DATABASE])
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            importer = UsersImporter(
+                UsersRepository(client[MONGO_DATABASE]),
+                executor,
+                workers,
+            )
+
+            with open(path) as source:
+                lines = enumerate(source, start=1)
+                for _ in islice(lines, resumed_at):  # noqa: WPS328
+                    pass  # skip what a previous run already imported
+
+                while True:
+                    batch: List[Record] = list(islice(lines, batch_size))
+                    if not batch:
+                        break
+
+                    failures = await importer.import_batch(batch, progress)
+                    _write_failures(report_path, failures)
+                    progress.save(checkpoint_path)
+
+                    elapsed = time.perf_counter() - started_at
+                    print(  # noqa: WPS421
+                        "line {0}: {1} inserted, {2} conflicts, "
+                        "{3} invalid, {4:.0f} records/s".format(
+                            progress.line,
+                            progress.inserted,
+                            progress.conflicts,
+                            progress.invalid,
+                            (progress.line - resumed_at) / elapsed,
+                        ),
+                    )
+    finally:
+        client.close()
+
+    return progress
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="NDJSON file with one user per line")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="processes hashing passwords",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help="progress file, PATH.checkpoint by default",
+    )
+    parser.add_argument(
+        "--report",
+        help="rejected records are appended here, PATH.rejected by default",
+    )
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(
+            run(
+                args.path,
+                args.batch_size,
+                args.workers,
+                args.checkpoint or "{0}.checkpoint".format(args.path),
+                args.report or "{0}.rejected".format(args.path),
+            ),
+        )
+    except UniqueIndexMissing as missing_error:
+        sys.exit(
+            "Unique indexes are missing, duplicates would be imported: "
+            "{0}; fix the data and run `python -m app.cli.indexes`".format(
+                missing_error,
+            ),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Build or check the indexes declared by the repositories.
+
+Run ``python -m app.cli.indexes`` ahead of a deploy to create missing
+indexes, or ``python -m app.cli.indexes --check`` to only report drift
+(the exit code is 1 when any drift is found).
+"""
+import argparse
+import asyncio
+import sys
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import MONGO_DATABASE, MONGO_URI
+from app.db.indexes import REPOSITORIES, ensure_indexes, get_index_drift
+
+
+async def run(check_only: bool) -> int:
+    client = AsyncIOMotorClient(MONGO_URI)
+    db = client[MONGO_DATABASE]
+
+    try:
+        if not check_only:
+            await ensure_indexes(db)
+
+        drifts = [
+            await get_index_drift(db, repo_type)
+            for repo_type in REPOSITORIES
+        ]
+    finally:
+        client.close()
+
+    for drift in drifts:
+        print(drift.describe())
+
+    return int(any(drift.has_drift for drift in drifts))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="only report drift from the declared indexes",
+    )
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(run(args.check)))
+
+
+if __name__ == "__main__":
+    main()
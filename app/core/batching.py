@@ -0,0 +1,86 @@
+import asyncio
+from typing import (Any, Awaitable, Callable, Dict, Hashable, List,
+                    Optional, Set)
+
+LoadMany = Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+
+class BatchLoader:
+    """Merges lookups that arrive close together into one bulk load.
+
+    Keys requested through ``load`` are collected until ``window`` seconds
+    pass (zero means the end of the current event loop iteration) or
+    ``max_batch_size`` distinct keys are waiting, then ``load_many`` runs
+    once for all of them. Keys it does not return resolve to ``None``; an
+    exception it raises is raised to every caller of the batch.
+    """
+
+    def __init__(
+            self,
+            load_many: LoadMany,
+            max_batch_size: int,
+            window: float,
+    ) -> None:
+        self.load_many = load_many
+        self.max_batch_size = max_batch_size
+        self.window = window
+
+        self._pending: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._flush_handle: Optional[asyncio.Handle] = None
+        self._running: Set["asyncio.Task[None]"] = set()
+
+        self.loads = 0
+        self.batches = 0
+
+    async def load(self, key: Hashable) -> Any:
+        self.loads += 1
+        waiter = self._pending.get(key)
+
+        if waiter is None:
+            loop = asyncio.get_running_loop()
+            waiter = loop.create_future()
+            self._pending[key] = waiter
+
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+            elif self._flush_handle is None:
+                self._flush_handle = (
+                    loop.call_later(self.window, self._dispatch)
+                    if self.window > 0
+                    else loop.call_soon(self._dispatch)
+                )
+
+        # one cancelled caller must not fail the others waiting on the key
+        return await asyncio.shield(waiter)
+
+    def _dispatch(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, {}
+        if batch:
+            self.batches += 1
+            batch_load = asyncio.ensure_future(self._run(batch))
+            self._running.add(batch_load)
+            batch_load.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: Dict[Hashable, "asyncio.Future[Any]"]) -> None:
+        try:
+            loaded = await self.load_many(list(batch))
+        except Exception as load_error:  # noqa: B902
+            for waiter in batch.values():
+                if not waiter.done():
+                    waiter.set_exception(load_error)
+            return
+
+        for key, waiter in batch.items():
+            if not waiter.done():
+                waiter.set_result(loaded.get(key))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._pending),
+            "loads": self.loads,
+            "batches": self.batches,
+        }
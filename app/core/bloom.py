@@ -0,0 +1,58 @@
+import hashlib
+import math
+from typing import Dict
+
+
+class BloomFilter:
+    """Fixed size set membership test without false negatives.
+
+    Sized for ``capacity`` items at a false positive rate of
+    ``error_rate``; adding more items than that raises the rate but never
+    loses an item.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+
+        self.size = max(
+            int(-capacity * math.log(error_rate) / math.log(2) ** 2),
+            8,
+        )
+        self.hash_count = max(
+            int(round(self.size / capacity * math.log(2))),
+            1,
+        )
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        # double hashing, Kirsch and Mitzenmacher
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        for index in range(self.hash_count):
+            yield (first + index * second) % self.size
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str):
+            return False
+
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "count": self.count,
+            "capacity": self.capacity,
+            "bits": self.size,
+            "hashes": self.hash_count,
+        }
@@ -0,0 +1,91 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire after a time to live.
+
+    A cache created with ``maxsize`` or ``ttl`` of zero stores nothing,
+    which is how callers switch caching off from configuration.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = (
+            OrderedDict()
+        )
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry  # noqa: WPS110
+
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        return value
+
+    def set(
+            self,
+            key: Hashable,
+            value: Any,  # noqa: WPS110
+            ttl: Optional[float] = None,
+    ) -> None:
+        if not self.enabled:
+            return
+
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+
+        if ttl <= 0:
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> Any:
+        entry = self._entries.pop(key, None)
+
+        return entry[1] if entry else None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -17,6 +17,13 @@ MONGO_URI: str = config("MONGO_URI")
 MONGO_DATABASE: str = config("MONGO_DATABASE")
 MONGO_USERS_COLLECTION: str = config("MONGO_USERS_COLLECTION")
 
+# "memory" keeps users in process instead of Mongo, for tests and
+# benchmarks only: nothing is persisted or shared between workers
+STORAGE_BACKEND: str = config(
+    "STORAGE_BACKEND",
+    default="mongo"
+)
+
 MAX_CONNECTIONS_COUNT: int = config(
     "MAX_CONNECTIONS_COUNT",
     cast=int,
@@ -27,6 +34,29 @@ MIN_CONNECTIONS_COUNT: int = config(
     cast=int,
     default=10
 )
+MONGO_SERVER_SELECTION_TIMEOUT_MS: int = config(
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS",
+    cast=int,
+    default=30000
+)
+MONGO_CONNECT_TIMEOUT_MS: int = config(
+    "MONGO_CONNECT_TIMEOUT_MS",
+    cast=int,
+    default=20000
+)
+# how long a request may wait for a free pooled connection, 0 is forever
+MONGO_WAIT_QUEUE_TIMEOUT_MS: int = config(
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS",
+    cast=int,
+    default=0
+)
+# caps waiters at MAX_CONNECTIONS_COUNT * multiple; only understood by
+# pymongo 3.x, 0 leaves it unset
+MONGO_WAIT_QUEUE_MULTIPLE: int = config(
+    "MONGO_WAIT_QUEUE_MULTIPLE",
+    cast=int,
+    default=0
+)
 
 SECRET_KEY: Secret = config(
     "SECRET_KEY",
@@ -43,3 +73,171 @@ ALLOWED_HOSTS: List[str] = config(
     cast=CommaSeparatedStrings,
     default="",
 )
+
+# bcrypt releases the GIL, so threads are enough unless CPU-bound work
+# has to be isolated from the web workers; set to "process" for that.
+PASSWORD_HASHING_EXECUTOR: str = config(
+    "PASSWORD_HASHING_EXECUTOR",
+    default="thread"
+)
+PASSWORD_HASHING_WORKERS: int = config(
+    "PASSWORD_HASHING_WORKERS",
+    cast=int,
+    default=4
+)
+PASSWORD_HASHING_QUEUE_SIZE: int = config(
+    "PASSWORD_HASHING_QUEUE_SIZE",
+    cast=int,
+    default=64
+)
+
+# Resolved principals are cached per process. Writes made by this process
+# refresh the cache immediately, writes made elsewhere become visible
+# after at most PRINCIPAL_CACHE_TTL_SECONDS. A size of 0 disables it.
+PRINCIPAL_CACHE_SIZE: int = config(
+    "PRINCIPAL_CACHE_SIZE",
+    cast=int,
+    default=10000
+)
+PRINCIPAL_CACHE_TTL_SECONDS: float = config(
+    "PRINCIPAL_CACHE_TTL_SECONDS",
+    cast=float,
+    default=30
+)
+
+# Decoded access tokens are kept until they expire; tokens that failed
+# validation are remembered for a short time so floods of the same bad
+# token skip signature checks. A size of 0 disables either cache.
+VERIFIED_TOKEN_CACHE_SIZE: int = config(
+    "VERIFIED_TOKEN_CACHE_SIZE",
+    cast=int,
+    default=10000
+)
+REJECTED_TOKEN_CACHE_SIZE: int = config(
+    "REJECTED_TOKEN_CACHE_SIZE",
+    cast=int,
+    default=10000
+)
+REJECTED_TOKEN_CACHE_TTL_SECONDS: float = config(
+    "REJECTED_TOKEN_CACHE_TTL_SECONDS",
+    cast=float,
+    default=60
+)
+
+# Responses hand back the caller's current token (or the last one issued
+# for the same identity) until less than this much lifetime is left.
+ACCESS_TOKEN_REFRESH_THRESHOLD_MINUTES: int = config(
+    "ACCESS_TOKEN_REFRESH_THRESHOLD_MINUTES",
+    cast=int,
+    default=60 * 24
+)
+ISSUED_TOKEN_CACHE_SIZE: int = config(
+    "ISSUED_TOKEN_CACHE_SIZE",
+    cast=int,
+    default=10000
+)
+
+# Routes opted into stateless authentication trust the role, activity and
+# version carried by tokens younger than this instead of loading the user.
+# Changes made by this process revoke stale claims right away, changes made
+# by other instances are seen after at most this long. Responses then hand
+# out tokens at most this old. 0 authenticates every route statefully.
+STATELESS_AUTH_MAX_AGE_SECONDS: int = config(
+    "STATELESS_AUTH_MAX_AGE_SECONDS",
+    cast=int,
+    default=0
+)
+# users updated within two STATELESS_AUTH_MAX_AGE_SECONDS windows; more
+# only raise the rate of (harmless) fallbacks to a user lookup
+REVOCATION_FILTER_CAPACITY: int = config(
+    "REVOCATION_FILTER_CAPACITY",
+    cast=int,
+    default=100000
+)
+REVOCATION_FILTER_ERROR_RATE: float = config(
+    "REVOCATION_FILTER_ERROR_RATE",
+    cast=float,
+    default=0.001
+)
+
+# Tokens issued before the "sub" claim carried the user id are resolved by
+# first and last name. Turn this off once every legacy token has expired,
+# which is at most a week after the versioned format was deployed.
+ACCEPT_LEGACY_TOKENS: bool = config(
+    "ACCEPT_LEGACY_TOKENS",
+    cast=bool,
+    default=True
+)
+
+CREATE_INDEXES_ON_STARTUP: bool = config(
+    "CREATE_INDEXES_ON_STARTUP",
+    cast=bool,
+    default=True
+)
+
+# last_login updates are buffered and written in bulk at this interval,
+# or as soon as this many users are pending
+LAST_LOGIN_FLUSH_INTERVAL_SECONDS: float = config(
+    "LAST_LOGIN_FLUSH_INTERVAL_SECONDS",
+    cast=float,
+    default=1
+)
+LAST_LOGIN_FLUSH_BATCH_SIZE: int = config(
+    "LAST_LOGIN_FLUSH_BATCH_SIZE",
+    cast=int,
+    default=500
+)
+
+USERS_PAGE_MAX_SIZE: int = config(
+    "USERS_PAGE_MAX_SIZE",
+    cast=int,
+    default=200
+)
+
+# documents fetched per cursor round trip while exporting users
+EXPORT_BATCH_SIZE: int = config(
+    "EXPORT_BATCH_SIZE",
+    cast=int,
+    default=1000
+)
+
+# records validated, hashed and inserted together by the bulk importer
+IMPORT_BATCH_SIZE: int = config(
+    "IMPORT_BATCH_SIZE",
+    cast=int,
+    default=1000
+)
+
+# operations accepted by one admin batch update request
+USERS_BATCH_MAX_SIZE: int = config(
+    "USERS_BATCH_MAX_SIZE",
+    cast=int,
+    default=1000
+)
+
+# lookups of different users arriving within the window are merged into one
+# $in/$or query of at most this many keys; a size of 1 disables batching
+USER_LOOKUP_BATCH_SIZE: int = config(
+    "USER_LOOKUP_BATCH_SIZE",
+    cast=int,
+    default=100
+)
+# 0 collects lookups until the end of the current event loop iteration
+USER_LOOKUP_BATCH_WINDOW_MS: float = config(
+    "USER_LOOKUP_BATCH_WINDOW_MS",
+    cast=float,
+    default=0
+)
+
+# Mongo commands slower than this are logged with their redacted filter and
+# kept, the latest MONGO_SLOW_OPERATION_LOG_SIZE of them, for admins
+MONGO_SLOW_OPERATION_MS: float = config(
+    "MONGO_SLOW_OPERATION_MS",
+    cast=float,
+    default=100
+)
+MONGO_SLOW_OPERATION_LOG_SIZE: int = config(
+    "MONGO_SLOW_OPERATION_LOG_SIZE",
+    cast=int,
+    default=100
+)
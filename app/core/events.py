@@ -3,19 +3,41 @@ from typing import Callable
 from fastapi import FastAPI
 from loguru import logger
 
-from app.db.events import close_db_connection, connect_to_db
+from app.core.config import (CREATE_INDEXES_ON_STARTUP,
+                             LAST_LOGIN_FLUSH_BATCH_SIZE,
+                             LAST_LOGIN_FLUSH_INTERVAL_SECONDS)
+from app.db.events import (check_db_indexes, close_db_connection,
+                           connect_to_db, create_db_indexes)
+from app.db.repositories.users import UsersRepository, principal_lookups
+from app.services.login_times import LastLoginWriter
+from app.services.passwords import hashing_pool
 
 
 def create_start_app_handler(app: FastAPI) -> Callable:  # type: ignore
     async def start_app() -> None:
         await connect_to_db(app)
 
+        if CREATE_INDEXES_ON_STARTUP:
+            await create_db_indexes(app)
+        # duplicate users are only rejected by unique indexes
+        await check_db_indexes(app)
+
+        app.state.last_login_writer = LastLoginWriter(
+            UsersRepository(app.state.db),
+            interval=LAST_LOGIN_FLUSH_INTERVAL_SECONDS,
+            batch_size=LAST_LOGIN_FLUSH_BATCH_SIZE,
+        )
+        app.state.last_login_writer.start()
+
     return start_app
 
 
 def create_stop_app_handler(app: FastAPI) -> Callable:  # type: ignore
     @logger.catch
     async def stop_app() -> None:
+        await app.state.last_login_writer.stop()
+        logger.info("Principal lookups: {0}", principal_lookups.stats())
         await close_db_connection(app)
+        hashing_pool.shutdown()
 
     return stop_app
@@ -0,0 +1,163 @@
+import math
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+# seconds; finer than Prometheus' defaults since most phases are short
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(label_value: str) -> str:
+    return (
+        label_value.replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+
+    return "{{{0}}}".format(",".join(
+        '{0}="{1}"'.format(name, _escape(str(label_value)))
+        for name, label_value in zip(names, values)
+    ))
+
+
+def _format_number(number: float) -> str:
+    if math.isinf(number):
+        return "+Inf" if number > 0 else "-Inf"
+
+    return repr(float(number)) if isinstance(number, float) else str(number)
+
+
+class Histogram:
+    """Prometheus histogram kept in process, one series per label set."""
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+        # label values -> [count per bucket..., +Inf count, sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+        # observed from the event loop and from executor threads
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:  # noqa: WPS110
+        index = bisect_left(self.buckets, value)
+
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = [0] * (len(self.buckets) + 2)
+                self._series[labelvalues] = series
+
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self) -> Dict[LabelValues, Dict[str, Any]]:
+        with self._lock:
+            snapshot = {
+                labelvalues: list(series)
+                for labelvalues, series in self._series.items()
+            }
+
+        collected = {}
+        for labelvalues, series in snapshot.items():
+            cumulative, counts = 0, []
+            for bucket_count in series[:-1]:
+                cumulative += bucket_count
+                counts.append(cumulative)
+
+            collected[labelvalues] = {
+                "buckets": dict(zip(self.buckets + (math.inf,), counts)),
+                "count": cumulative,
+                "sum": series[-1],
+            }
+
+        return collected
+
+    @staticmethod
+    def quantile(series: Dict[str, Any], fraction: float) -> float:
+        """Upper bound of the bucket holding the ``fraction`` quantile of a
+        ``collect()`` series, as ``histogram_quantile`` would bound it.
+        """
+        rank = fraction * series["count"]
+
+        for bound, count in series["buckets"].items():
+            if count >= rank:
+                return bound
+
+        return math.inf
+
+    def render(self) -> Iterable[str]:
+        yield "# HELP {0} {1}".format(self.name, self.documentation)
+        yield "# TYPE {0} histogram".format(self.name)
+
+        bucket_labels = self.labelnames + ("le",)
+        for labelvalues, series in sorted(self.collect().items()):
+            for bound, count in series["buckets"].items():
+                yield "{0}_bucket{1} {2}".format(
+                    self.name,
+                    _format_labels(
+                        bucket_labels,
+                        labelvalues + (_format_number(bound),),
+                    ),
+                    count,
+                )
+
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield "{0}_sum{1} {2}".format(
+                self.name,
+                labels,
+                _format_number(series["sum"]),
+            )
+            yield "{0}_count{1} {2}".format(
+                self.name,
+                labels,
+                series["count"],
+            )
+
+
+def render_counter(
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        counts: Dict[LabelValues, float],
+) -> Iterable[str]:
+    yield "# HELP {0} {1}".format(name, documentation)
+    yield "# TYPE {0} counter".format(name)
+
+    for labelvalues, count in sorted(counts.items()):
+        yield "{0}{1} {2}".format(
+            name,
+            _format_labels(labelnames, labelvalues),
+            _format_number(count),
+        )
+
+
+def render_stats(prefix: str, stats: Dict[str, Any]) -> Iterable[str]:
+    """Expose the numeric values of a ``stats()`` dict as gauges."""
+    for key, stat_value in stats.items():
+        if isinstance(stat_value, bool):
+            stat_value = int(stat_value)
+        if not isinstance(stat_value, (int, float)):
+            continue
+
+        name = "{0}_{1}".format(prefix, key)
+        yield "# TYPE {0} gauge".format(name)
+        yield "{0} {1}".format(name, _format_number(stat_value))
@@ -0,0 +1,51 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Shares one in-flight call between concurrent callers of a key.
+
+    The first caller of ``do`` starts the call, everyone arriving for the
+    same key before it finishes awaits that same call and gets its result
+    or its exception. Nothing is kept once the call is done, so this is
+    not a cache.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+        self.calls = 0
+        self.coalesced = 0
+
+    def _forget(self, key: Hashable, call: "asyncio.Future[Any]") -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+        # waiters may all be gone; mark the exception as retrieved anyway
+        if not call.cancelled():
+            call.exception()
+
+    async def do(
+            self,
+            key: Hashable,
+            func: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        call = self._calls.get(key)
+
+        if call is None:
+            self.calls += 1
+            call = asyncio.ensure_future(func())
+            call.add_done_callback(lambda done: self._forget(key, done))
+            self._calls[key] = call
+        else:
+            self.coalesced += 1
+
+        # a cancelled waiter must not cancel the call the others share
+        return await asyncio.shield(call)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._calls),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
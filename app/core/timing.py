@@ -0,0 +1,169 @@
+import asyncio
+import inspect
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, FrozenSet, Optional, Type
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import Histogram
+
+# phase -> seconds spent in it by the current request
+_phase_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "phase_timings",
+    default=None,
+)
+# phases being timed by an enclosing call, nested calls are not counted
+_active_phases: ContextVar[FrozenSet[str]] = ContextVar(
+    "active_phases",
+    default=frozenset(),
+)
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time to the start of the response by route.",
+    labelnames=("route", "method", "status"),
+)
+phase_duration = Histogram(
+    "http_request_phase_duration_seconds",
+    "Time spent per request in each instrumented phase by route.",
+    labelnames=("route", "phase"),
+)
+
+
+def _record(phase: str, started: float) -> None:
+    timings = _phase_timings.get()
+    if timings is not None:
+        timings[phase] = (
+            timings.get(phase, 0.0) + time.perf_counter() - started
+        )
+
+
+def timed(phase: str) -> Callable:
+    """Add the time spent in the decorated function to ``phase``.
+
+    Works on plain and coroutine functions. Outside of a request, or when
+    an enclosing call already times ``phase``, the function runs as is.
+    """
+    def decorator(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                active = _active_phases.get()
+                if _phase_timings.get() is None or phase in active:
+                    return await func(*args, **kwargs)
+
+                token = _active_phases.set(active | {phase})
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    _record(phase, started)
+                    _active_phases.reset(token)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            active = _active_phases.get()
+            if _phase_timings.get() is None or phase in active:
+                return func(*args, **kwargs)
+
+            token = _active_phases.set(active | {phase})
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(phase, started)
+                _active_phases.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+def timed_methods(phase: str) -> Callable[[Type], Type]:
+    """Class decorator applying ``timed(phase)`` to public coroutines."""
+    def decorator(cls: Type) -> Type:
+        for name, attribute in list(vars(cls).items()):
+            if not name.startswith("_") and inspect.iscoroutinefunction(
+                attribute,
+            ):
+                setattr(cls, name, timed(phase)(attribute))
+
+        return cls
+
+    return decorator
+
+
+def _server_timing(timings: Dict[str, float], total: float) -> bytes:
+    entries = [
+        "{0};dur={1:.3f}".format(phase, seconds * 1000)
+        for phase, seconds in timings.items()
+    ]
+    entries.append("total;dur={0:.3f}".format(total * 1000))
+
+    return ", ".join(entries).encode("latin-1")
+
+
+class ServerTimingMiddleware:
+    """Times each HTTP request and the phases instrumented with ``timed``.
+
+    The breakdown is sent in a ``Server-Timing`` header and recorded in
+    the ``request_duration`` and ``phase_duration`` histograms, labelled
+    with the name of the matched route.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._route_names: Dict[Callable, str] = {}
+
+    def _route_name(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+
+        if endpoint not in self._route_names:
+            self._route_names.update(
+                (route.endpoint, route.name)
+                for route in scope["router"].routes
+                if hasattr(route, "endpoint")
+            )
+
+        return self._route_names.get(endpoint, endpoint.__name__)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, float] = {}
+        token = _phase_timings.set(timings)
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - started
+                route = self._route_name(scope)
+
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [
+                    (b"server-timing", _server_timing(timings, total)),
+                ]
+
+                request_duration.observe(
+                    total,
+                    route,
+                    scope["method"],
+                    str(message["status"]),
+                )
+                for phase, seconds in timings.items():
+                    phase_duration.observe(seconds, route, phase)
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _phase_timings.reset(token)
@@ -1,19 +1,133 @@
+import asyncio
+
 from fastapi import FastAPI
 from loguru import logger
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import PyMongoError
+
+from app.core.config import (MAX_CONNECTIONS_COUNT, MIN_CONNECTIONS_COUNT,
+                             MONGO_CONNECT_TIMEOUT_MS, MONGO_DATABASE,
+                             MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_URI,
+                             MONGO_WAIT_QUEUE_MULTIPLE,
+                             MONGO_WAIT_QUEUE_TIMEOUT_MS, STORAGE_BACKEND)
+from app.db.indexes import (UniqueIndexMissing, check_unique_indexes,
+                            ensure_indexes)
+from app.db.memory import InMemoryDatabase
+from app.db.monitoring import command_stats, pool_stats
+from app.db.repositories.memory import InMemoryUsersRepository
+from app.db.repositories.users import (UsersRepository, principal_cache,
+                                       principal_versions, user_loaders)
+
+MONGO_BACKEND = "mongo"
+MEMORY_BACKEND = "memory"
+
+
+def _get_client_options() -> dict:
+    options = {
+        "maxPoolSize": MAX_CONNECTIONS_COUNT,
+        "minPoolSize": MIN_CONNECTIONS_COUNT,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "event_listeners": [pool_stats, command_stats],
+    }
+
+    if MONGO_WAIT_QUEUE_TIMEOUT_MS:
+        options["waitQueueTimeoutMS"] = MONGO_WAIT_QUEUE_TIMEOUT_MS
+
+    if MONGO_WAIT_QUEUE_MULTIPLE:
+        options["waitQueueMultiple"] = MONGO_WAIT_QUEUE_MULTIPLE
 
-from app.core.config import MONGO_DATABASE, MONGO_URI
+    return options
+
+
+async def warm_up_connection_pool(app: FastAPI) -> None:
+    # concurrent pings force the pool to open MIN_CONNECTIONS_COUNT
+    # connections before the first request needs them
+    pings = [
+        app.state.db_client.admin.command("ping")
+        for _ in range(max(MIN_CONNECTIONS_COUNT, 1))
+    ]
+
+    try:
+        await asyncio.gather(*pings)
+    except PyMongoError as warm_up_error:
+        logger.warning("Connection pool warm-up failed: {0}", warm_up_error)
+    else:
+        logger.info("Connection pool warmed up: {0}", pool_stats.stats())
+
+
+def create_memory_database() -> InMemoryDatabase:
+    return InMemoryDatabase({UsersRepository: InMemoryUsersRepository})
 
 
 async def connect_to_db(app: FastAPI) -> None:
+    if STORAGE_BACKEND not in {MONGO_BACKEND, MEMORY_BACKEND}:
+        raise ValueError(
+            "unknown storage backend {0}".format(STORAGE_BACKEND)
+        )
+
+    principal_cache.clear()
+    principal_versions.clear()
+    user_loaders.clear()
+
+    if STORAGE_BACKEND == MEMORY_BACKEND:
+        logger.warning("Users are kept in memory and lost on shutdown")
+        app.state.db_client = None
+        app.state.db = create_memory_database()
+        return
+
     logger.info("Connecting to {0}", repr(MONGO_URI))
-    app.state.db_client = AsyncIOMotorClient(MONGO_URI)
+    app.state.db_client = AsyncIOMotorClient(
+        MONGO_URI,
+        **_get_client_options(),
+    )
     app.state.db = app.state.db_client[MONGO_DATABASE]
+
+    await warm_up_connection_pool(app)
+
     logger.info("Connection established")
 
 
+async def create_db_indexes(app: FastAPI) -> None:
+    if app.state.db_client is None:
+        # in-memory repositories build their indexes themselves
+        return
+
+    logger.info("Checking database indexes")
+
+    try:
+        await ensure_indexes(app.state.db)
+    except PyMongoError as index_error:
+        # e.g. duplicates blocking a unique index; check_db_indexes stops
+        # the startup if a unique one is missing, others are only hints
+        logger.error("Index creation failed: {0}", index_error)
+    else:
+        logger.info("Indexes are up to date")
+
+
+async def check_db_indexes(app: FastAPI) -> None:
+    if app.state.db_client is None:
+        return
+
+    try:
+        await check_unique_indexes(app.state.db)
+    except UniqueIndexMissing as missing_error:
+        logger.error(
+            "Unique indexes are missing, duplicates would not be rejected: "
+            "{0}; fix the data and run `python -m app.cli.indexes`",
+            missing_error,
+        )
+        raise
+
+
 async def close_db_connection(app: FastAPI) -> None:
-    logger.info("Closing connection to database")
+    if app.state.db_client is None:
+        return
+
+    logger.info(
+        "Closing connection to database, pool: {0}",
+        pool_stats.stats(),
+    )
 
     app.state.db_client.close()
 
@@ -0,0 +1,121 @@
+from typing import Any, Dict, List, Type
+
+from loguru import logger
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
+
+from app.db.repositories.base import BaseRepository
+from app.db.repositories.users import UsersRepository
+
+REPOSITORIES: List[Type[BaseRepository]] = [
+    UsersRepository,
+]
+
+# index options that change how an index behaves, others are build hints
+_COMPARED_OPTIONS = ('unique', 'sparse', 'partialFilterExpression')
+
+
+class UniqueIndexMissing(Exception):
+    pass
+
+
+class IndexDrift:
+    def __init__(self, collection_name: str) -> None:
+        self.collection_name = collection_name
+        self.missing: List[IndexModel] = []
+        self.changed: List[str] = []
+        self.unexpected: List[str] = []
+
+    @property
+    def has_drift(self) -> bool:
+        return bool(self.missing or self.changed or self.unexpected)
+
+    def describe(self) -> str:
+        return "{0}: missing={1} changed={2} unexpected={3}".format(
+            self.collection_name,
+            [index.document['name'] for index in self.missing],
+            self.changed,
+            self.unexpected,
+        )
+
+
+def _index_signature(spec: Dict[str, Any]) -> tuple:
+    return (
+        [tuple(key) for key in spec['key']],
+        tuple(spec.get(option) for option in _COMPARED_OPTIONS),
+    )
+
+
+async def get_index_drift(
+        db: AsyncIOMotorDatabase,
+        repo_type: Type[BaseRepository],
+) -> IndexDrift:
+    drift = IndexDrift(repo_type.collection_name)
+    collection = db[repo_type.collection_name]
+
+    existing = await collection.index_information()
+    existing.pop('_id_', None)
+
+    for index in repo_type.indexes:
+        declared = dict(index.document)
+        declared['key'] = list(declared['key'].items())
+        present = existing.pop(declared['name'], None)
+
+        if present is None:
+            drift.missing.append(index)
+        elif _index_signature(present) != _index_signature(declared):
+            drift.changed.append(declared['name'])
+
+    drift.unexpected.extend(existing)
+
+    return drift
+
+
+async def check_unique_indexes(db: AsyncIOMotorDatabase) -> None:
+    """Raise ``UniqueIndexMissing`` unless declared unique indexes exist.
+
+    Repositories detect duplicates only through these indexes, so without
+    them duplicate users would be written silently.
+    """
+    for repo_type in REPOSITORIES:
+        drift = await get_index_drift(db, repo_type)
+        broken = {index.document['name'] for index in drift.missing}
+        broken.update(drift.changed)
+        unique = [
+            index.document['name']
+            for index in repo_type.indexes
+            if index.document.get('unique')
+            and index.document['name'] in broken
+        ]
+
+        if unique:
+            raise UniqueIndexMissing(
+                "{0}: {1}".format(repo_type.collection_name, unique),
+            )
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> List[IndexDrift]:
+    """Create missing declared indexes and report any other drift.
+
+    Indexes that exist with a different definition, or are not declared
+    at all, are only reported: dropping them is left to an operator.
+    """
+    drifts = []
+
+    for repo_type in REPOSITORIES:
+        drift = await get_index_drift(db, repo_type)
+
+        if drift.missing:
+            logger.info(
+                "Creating indexes {0} on {1}",
+                [index.document['name'] for index in drift.missing],
+                repo_type.collection_name,
+            )
+            await db[repo_type.collection_name].create_indexes(drift.missing)
+
+        if drift.changed or drift.unexpected:
+            logger.warning("Index drift on {0}", drift.describe())
+
+        drifts.append(drift)
+
+    return drifts
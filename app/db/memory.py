@@ -0,0 +1,137 @@
+import bisect
+from typing import (Dict, Iterator, List, Mapping, Optional, Sequence, Tuple,
+                    Type)
+
+from bson import ObjectId
+from pymongo import IndexModel
+
+from app.db.errors import EntityAlreadyExists
+
+UniqueIndex = Tuple[Tuple[str, ...], Dict[tuple, ObjectId]]
+
+
+def _index_key(fields: Tuple[str, ...], document: dict) -> tuple:
+    return tuple(document.get(field) for field in fields)
+
+
+class InMemoryCollection:
+    """Documents keyed by ``_id`` and the unique indexes over them.
+
+    Documents are copied in and out, so callers can never change what is
+    stored without going through ``insert`` or ``update``.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+        self._documents: Dict[ObjectId, dict] = {}
+        # sorted, for ranges over _id like the Mongo _id index
+        self._ids: List[ObjectId] = []
+        self._unique: Dict[str, UniqueIndex] = {}
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def create_indexes(self, indexes: Sequence[IndexModel]) -> None:
+        """Build the unique ones of ``indexes``; others are not needed."""
+        for index in indexes:
+            name = index.document['name']
+            if not index.document.get('unique') or name in self._unique:
+                continue
+
+            fields = tuple(index.document['key'])
+            entries: Dict[tuple, ObjectId] = {}
+            for document_id, document in self._documents.items():
+                key = _index_key(fields, document)
+                if key in entries:
+                    raise EntityAlreadyExists(
+                        "duplicate key for index {0}".format(name),
+                    )
+                entries[key] = document_id
+
+            self._unique[name] = (fields, entries)
+
+    def get(self, document_id: ObjectId) -> Optional[dict]:
+        document = self._documents.get(document_id)
+
+        return None if document is None else dict(document)
+
+    def find_unique(self, index_name: str, key: tuple) -> Optional[dict]:
+        _, entries = self._unique[index_name]
+        document_id = entries.get(key)
+
+        return None if document_id is None else self.get(document_id)
+
+    def scan(self, after: Optional[ObjectId] = None) -> Iterator[dict]:
+        """Yield documents in ``_id`` order, starting past ``after``."""
+        start = 0 if after is None else bisect.bisect_right(self._ids, after)
+
+        for document_id in self._ids[start:]:
+            document = self._documents.get(document_id)
+            if document is not None:
+                yield dict(document)
+
+    def insert(self, document: dict) -> ObjectId:
+        document = dict(document)
+        document.setdefault('_id', ObjectId())
+        document_id = document['_id']
+
+        if document_id in self._documents:
+            raise EntityAlreadyExists("duplicate key for index _id_")
+        self._check_unique(document)
+
+        self._documents[document_id] = document
+        bisect.insort(self._ids, document_id)
+        for fields, entries in self._unique.values():
+            entries[_index_key(fields, document)] = document_id
+
+        return document_id
+
+    def update(self, document_id: ObjectId, data: dict) -> Optional[dict]:
+        """Set ``data`` on a document and return it, None if missing."""
+        current = self._documents.get(document_id)
+        if current is None:
+            return None
+
+        updated = dict(current, **data)
+        self._check_unique(updated)
+
+        for fields, entries in self._unique.values():
+            del entries[_index_key(fields, current)]
+            entries[_index_key(fields, updated)] = document_id
+        self._documents[document_id] = updated
+
+        return dict(updated)
+
+    def _check_unique(self, document: dict) -> None:
+        for name, (fields, entries) in self._unique.items():
+            owner = entries.get(_index_key(fields, document))
+            if owner is not None and owner != document['_id']:
+                raise EntityAlreadyExists(
+                    "duplicate key for index {0}".format(name),
+                )
+
+
+class InMemoryDatabase:
+    """In-process stand-in for the Motor database, see STORAGE_BACKEND.
+
+    Repositories created with it are built from the implementation
+    registered for their type in ``repository_types``, see
+    app/db/repositories/base.py.
+    """
+
+    def __init__(self, repository_types: Mapping[Type, Type]) -> None:
+        self.repository_types = dict(repository_types)
+        self._collections: Dict[str, InMemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        collection = self._collections.get(name)
+
+        if collection is None:
+            collection = InMemoryCollection(name)
+            self._collections[name] = collection
+
+        return collection
+
+    async def drop_collection(self, name: str) -> None:
+        self._collections.pop(name, None)
@@ -0,0 +1,274 @@
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Mapping, Tuple
+
+from loguru import logger
+from pymongo import monitoring
+
+from app.core.config import (MONGO_SLOW_OPERATION_LOG_SIZE,
+                             MONGO_SLOW_OPERATION_MS)
+from app.core.metrics import Histogram, render_counter
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Counts connection pool activity of every client it is passed to.
+
+    pymongo calls listeners from its own threads, hence the lock.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+        self.checked_out = 0
+        self.waiting = 0
+        self.created = 0
+        self.closed = 0
+        self.check_out_failures = 0
+        self.pool_clears = 0
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        """Pools are counted through their connections."""
+
+    def pool_ready(self, event: monitoring.PoolCreatedEvent) -> None:
+        """Only sent by pymongo 4."""
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        """Pools are counted through their connections."""
+
+    def connection_created(
+            self,
+            event: monitoring.ConnectionCreatedEvent,
+    ) -> None:
+        with self._lock:
+            self.created += 1
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        """Created connections are counted in ``connection_created``."""
+
+    def connection_closed(
+            self,
+            event: monitoring.ConnectionClosedEvent,
+    ) -> None:
+        with self._lock:
+            self.closed += 1
+
+    def connection_check_out_started(
+            self,
+            event: monitoring.ConnectionCheckOutStartedEvent,
+    ) -> None:
+        with self._lock:
+            self.waiting += 1
+
+    def connection_check_out_failed(
+            self,
+            event: monitoring.ConnectionCheckOutFailedEvent,
+    ) -> None:
+        with self._lock:
+            self.waiting -= 1
+            self.check_out_failures += 1
+
+    def connection_checked_out(
+            self,
+            event: monitoring.ConnectionCheckedOutEvent,
+    ) -> None:
+        with self._lock:
+            self.waiting -= 1
+            self.checked_out += 1
+
+    def connection_checked_in(
+            self,
+            event: monitoring.ConnectionCheckedInEvent,
+    ) -> None:
+        with self._lock:
+            self.checked_out -= 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "checked_out": self.checked_out,
+                "waiting": self.waiting,
+                "created": self.created,
+                "closed": self.closed,
+                "open": self.created - self.closed,
+                "check_out_failures": self.check_out_failures,
+                "pool_clears": self.pool_clears,
+            }
+
+
+pool_stats = PoolStatsListener()
+
+
+def _redact(command_value: Any) -> Any:  # noqa: WPS110
+    # keeps field names and operators, hides every value
+    if isinstance(command_value, dict):
+        return {key: _redact(nested) for key, nested in command_value.items()}
+
+    if isinstance(command_value, list):
+        shapes: List[Any] = []
+        for item in command_value:
+            if isinstance(item, dict) and _redact(item) not in shapes:
+                shapes.append(_redact(item))
+        return shapes or "?"
+
+    return "?"
+
+
+def _filter_of(command_name: str, command: Mapping[str, Any]) -> Any:
+    if command_name in {"find", "count", "distinct"}:
+        return command.get("filter", command.get("query"))
+    if command_name == "findAndModify":
+        return command.get("query")
+    if command_name == "update":
+        return [update.get("q") for update in command.get("updates", [])]
+    if command_name == "delete":
+        return [delete.get("q") for delete in command.get("deletes", [])]
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline") or [{}]
+        return pipeline[0].get("$match")
+
+    return None
+
+
+class CommandStatsListener(monitoring.CommandListener):
+    """Latency per collection and command, failures and slow operations.
+
+    Operations slower than ``slow_threshold_ms`` are logged together with
+    the shape of their filter, values replaced by ``"?"``; the latest
+    ``slow_log_size`` of them are kept for the admin monitoring route.
+    """
+
+    def __init__(self, slow_threshold_ms: float, slow_log_size: int) -> None:
+        self.slow_threshold_ms = slow_threshold_ms
+
+        self._lock = threading.Lock()
+        # (collection, database, command) of commands still running
+        self._started: Dict[Tuple[Any, int], Tuple[str, str, Mapping]] = {}
+
+        self.latency = Histogram(
+            "mongo_command_duration_seconds",
+            "Mongo command latency by collection and command.",
+            labelnames=("collection", "command"),
+        )
+        self.failures: Dict[Tuple[str, str], int] = {}
+        self.slow_operations: Deque[Dict[str, Any]] = deque(
+            maxlen=slow_log_size,
+        )
+
+    @staticmethod
+    def _key(event: Any) -> Tuple[Any, int]:
+        return event.connection_id, event.request_id
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+
+        with self._lock:
+            self._started[self._key(event)] = (
+                target if isinstance(target, str) else "",
+                event.database_name,
+                event.command,
+            )
+
+    def _finish(self, event: Any) -> Tuple[str, str, Mapping]:
+        # succeeded and failed events only name the database on pymongo 4
+        with self._lock:
+            return self._started.pop(self._key(event), ("", "", {}))
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        collection, database, command = self._finish(event)
+        duration_ms = event.duration_micros / 1000
+
+        self.latency.observe(
+            duration_ms / 1000,
+            collection,
+            event.command_name,
+        )
+
+        if duration_ms >= self.slow_threshold_ms:
+            self._log_slow(
+                event.command_name,
+                (database, collection),
+                command,
+                duration_ms,
+            )
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        collection, _, _ = self._finish(event)
+        labels = (collection, event.command_name)
+
+        self.latency.observe(event.duration_micros / 1e6, *labels)
+        with self._lock:
+            self.failures[labels] = self.failures.get(labels, 0) + 1
+
+    def _log_slow(
+            self,
+            command_name: str,
+            namespace: Tuple[str, str],
+            command: Mapping,
+            duration_ms: float,
+    ) -> None:
+        operation = {
+            "at": datetime.utcnow(),
+            "database": namespace[0],
+            "collection": namespace[1],
+            "command": command_name,
+            "duration_ms": duration_ms,
+            "filter": _redact(_filter_of(command_name, command)),
+        }
+        logger.warning(
+            "Slow Mongo {0} on {1}.{2}: {3:.1f} ms, filter {4}",
+            operation["command"],
+            operation["database"],
+            operation["collection"],
+            duration_ms,
+            operation["filter"],
+        )
+
+        with self._lock:
+            self.slow_operations.append(operation)
+
+    def stats(self) -> Dict[str, Any]:
+        commands = []
+        for (collection, command_name), series in sorted(
+            self.latency.collect().items(),
+        ):
+            commands.append({
+                "collection": collection,
+                "command": command_name,
+                "count": series["count"],
+                "failures": self.failures.get((collection, command_name), 0),
+                "mean_ms": series["sum"] / series["count"] * 1000,
+                "p50_le_ms": Histogram.quantile(series, 0.5) * 1000,
+                "p95_le_ms": Histogram.quantile(series, 0.95) * 1000,
+                "p99_le_ms": Histogram.quantile(series, 0.99) * 1000,
+            })
+
+        with self._lock:
+            slow_operations = list(self.slow_operations)
+
+        return {"commands": commands, "slow_operations": slow_operations}
+
+    def render(self) -> Iterable[str]:
+        yield from self.latency.render()
+
+        with self._lock:
+            failures = dict(self.failures)
+
+        yield from render_counter(
+            "mongo_command_failures_total",
+            "Failed Mongo commands by collection and command.",
+            self.latency.labelnames,
+            failures,
+        )
+
+
+command_stats = CommandStatsListener(
+    slow_threshold_ms=MONGO_SLOW_OPERATION_MS,
+    slow_log_size=MONGO_SLOW_OPERATION_LOG_SIZE,
+)
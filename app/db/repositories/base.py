@@ -1,7 +1,24 @@
+from typing import List
+
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import IndexModel
+
+from app.db.memory import InMemoryDatabase
 
 
 class BaseRepository:
+    collection_name: str = ""
+    # indexes the repository queries rely on, see app/db/indexes.py
+    indexes: List[IndexModel] = []
+
+    def __new__(cls, client: AsyncIOMotorDatabase) -> "BaseRepository":
+        # the in-memory backend brings its own implementation of each
+        # repository, so call sites stay the same for both backends
+        if isinstance(client, InMemoryDatabase):
+            cls = client.repository_types.get(cls, cls)  # noqa: WPS117
+
+        return super().__new__(cls)
+
     def __init__(self, client: AsyncIOMotorDatabase) -> None:
         self._client = client
 
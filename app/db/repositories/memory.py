@@ -0,0 +1,217 @@
+from datetime import datetime
+from typing import (AsyncIterator, Collection, Dict, List, Optional, Sequence,
+                    Tuple)
+
+from bson import ObjectId
+
+from app.core.timing import timed_methods
+from app.db.errors import EntityAlreadyExists, EntityDoesNotExist
+from app.db.memory import InMemoryDatabase
+from app.db.repositories.users import EXPORT_PROJECTION, UsersRepository
+from app.models.users import User
+
+NAME_INDEX = 'first_name_last_name'
+EXPORT_KEYS = ('_id', *EXPORT_PROJECTION)
+
+
+def _to_user(document: dict, with_password: bool = True) -> User:
+    if not with_password:
+        document.pop('hashed_pass', None)
+
+    return User.from_mongo_trusted(document)
+
+
+def _found(document: Optional[dict], with_password: bool) -> User:
+    if document is None:
+        raise EntityDoesNotExist(
+            "user does not exist"
+        )
+
+    return _to_user(document, with_password)
+
+
+@timed_methods("db")
+class InMemoryUsersRepository(UsersRepository):
+    """``UsersRepository`` over an ``InMemoryDatabase``.
+
+    Lookups are answered from the document dict and the unique name index,
+    so they are neither batched nor sent as queries; caching of principals
+    and its invalidation are inherited unchanged. Writes fail the same way
+    as on Mongo with the declared indexes in place.
+    """
+
+    def __init__(self, client: InMemoryDatabase):
+        super().__init__(client)
+        # Mongo rejects duplicates once the indexes are built at startup;
+        # here they always exist
+        self.collection.create_indexes(self.indexes)
+
+    async def get_user_by_id(
+        self,
+        user_id: str,
+        *,
+        with_password: bool = True,
+    ) -> User:
+        return _found(self.collection.get(ObjectId(user_id)), with_password)
+
+    async def get_user_by_first_last_name(
+        self,
+        first_name,
+        last_name,
+        *,
+        with_password: bool = True,
+    ) -> User:
+        return _found(
+            self.collection.find_unique(NAME_INDEX, (first_name, last_name)),
+            with_password,
+        )
+
+    async def get_users_by_ids(
+        self,
+        user_ids: Collection[ObjectId],
+        *,
+        with_password: bool = True,
+    ) -> Dict[ObjectId, User]:
+        documents = (self.collection.get(user_id) for user_id in user_ids)
+
+        return {
+            document['_id']: _to_user(document, with_password)
+            for document in documents
+            if document is not None
+        }
+
+    async def get_users_by_first_last_names(
+        self,
+        names: Collection[Tuple[str, str]],
+        *,
+        with_password: bool = True,
+    ) -> Dict[Tuple[str, str], User]:
+        documents = (
+            self.collection.find_unique(NAME_INDEX, name) for name in names
+        )
+
+        return {
+            (document['first_name'], document['last_name']): _to_user(
+                document,
+                with_password,
+            )
+            for document in documents
+            if document is not None
+        }
+
+    async def get_name_owners(
+        self,
+        names: Collection[Tuple[str, str]],
+    ) -> Dict[Tuple[str, str], ObjectId]:
+        owners = {}
+
+        for name in names:
+            document = self.collection.find_unique(NAME_INDEX, name)
+            if document is not None:
+                owners[name] = document['_id']
+
+        return owners
+
+    async def list_users(
+        self,
+        *,
+        limit: int,
+        after: Optional[ObjectId] = None,
+        role: Optional[str] = None,
+        is_active: Optional[bool] = None,
+    ) -> List[User]:
+        users: List[User] = []
+
+        for document in self.collection.scan(after=after):
+            if role is not None and document['role'] != role:
+                continue
+            if is_active is not None and document['is_active'] != is_active:
+                continue
+
+            users.append(_to_user(document, with_password=False))
+            # a limit of 0 means no limit, as for a Mongo cursor
+            if len(users) == limit:
+                break
+
+        return users
+
+    async def iter_users(
+        self,
+        *,
+        batch_size: int,
+    ) -> AsyncIterator[dict]:
+        for document in self.collection.scan():
+            yield {
+                key: document[key] for key in EXPORT_KEYS if key in document
+            }
+
+    async def _insert_user(self, document: dict) -> ObjectId:
+        return self.collection.insert(document)
+
+    async def insert_users(
+        self,
+        users: Sequence[User],
+    ) -> Dict[int, str]:
+        errors = {}
+
+        for position, user in enumerate(users):
+            try:
+                self.collection.insert(user.dict(exclude={"id"}))
+            except EntityAlreadyExists:
+                errors[position] = "user already exists"
+
+        return errors
+
+    async def update_login_times(
+        self,
+        login_times: Dict[ObjectId, datetime],
+    ) -> None:
+        for user_id, login_time in login_times.items():
+            document = self.collection.get(user_id)
+            if document is None:
+                continue
+
+            last_login = document.get('last_login')
+            if last_login is None or last_login < login_time:
+                self.collection.update(user_id, {'last_login': login_time})
+
+    async def update_users(
+        self,
+        updates: Sequence[Tuple[ObjectId, dict]],
+    ) -> Dict[int, str]:
+        errors = {}
+
+        for position, (user_id, data) in enumerate(updates):
+            try:
+                self._set_and_bump(user_id, data)
+            except EntityAlreadyExists:
+                errors[position] = "user already exists"
+
+        return errors
+
+    async def _find_one_and_set(self, user: User, data: dict) -> dict:
+        try:
+            document = self._set_and_bump(user.id, data)
+        except EntityAlreadyExists as duplicate_error:
+            raise EntityAlreadyExists(
+                "user already exists"
+            ) from duplicate_error
+
+        if document is not None:
+            document.pop('hashed_pass', None)
+
+        return document
+
+    def _set_and_bump(
+        self,
+        user_id: ObjectId,
+        data: dict,
+    ) -> Optional[dict]:
+        document = self.collection.get(user_id)
+        if document is None:
+            return None
+
+        return self.collection.update(
+            user_id,
+            dict(data, version=document.get('version', 0) + 1),
+        )
@@ -1,50 +1,419 @@
+from datetime import datetime
+from functools import partial
+from typing import (AsyncIterator, Awaitable, Callable, Collection, Dict,
+                    Hashable, List, Optional, Sequence, Tuple)
+
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from pymongo import ReturnDocument
+from pymongo import ASCENDING, IndexModel, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 
-from app.core.config import MONGO_USERS_COLLECTION
-from app.db.errors import EntityDoesNotExist
+from app.core.batching import BatchLoader
+from app.core.cache import TTLCache
+from app.core.config import (MONGO_USERS_COLLECTION, PRINCIPAL_CACHE_SIZE,
+                             PRINCIPAL_CACHE_TTL_SECONDS,
+                             USER_LOOKUP_BATCH_SIZE,
+                             USER_LOOKUP_BATCH_WINDOW_MS)
+from app.core.singleflight import SingleFlight
+from app.core.timing import timed_methods
+from app.db.errors import EntityAlreadyExists, EntityDoesNotExist
 from app.db.repositories.base import BaseRepository
 from app.models.schemas.users import UserCreate, UserUpdate
 from app.models.users import User
+from app.services import passwords
+from app.services.revocation import revoked_versions
+
+# principals never need the password hash, so it is not fetched for them
+PRINCIPAL_PROJECTION = {'hashed_pass': False}
+# exports list what they include, so no new field can leak into them
+EXPORT_FIELDS = (
+    'id',
+    'first_name',
+    'last_name',
+    'role',
+    'is_active',
+    'created_at',
+    'last_login',
+)
+EXPORT_PROJECTION = {
+    field: True for field in EXPORT_FIELDS if field != 'id'
+}
+
+# only what is needed to tell who holds a name
+NAME_OWNER_PROJECTION = {'first_name': True, 'last_name': True}
+
+DUPLICATE_KEY_ERROR = 11000
+
+principal_cache = TTLCache(
+    maxsize=PRINCIPAL_CACHE_SIZE,
+    ttl=PRINCIPAL_CACHE_TTL_SECONDS,
+)
+# (user id, lowest version) each principal key may be cached with again
+# after a write, so a user read before the write cannot be cached over it
+principal_versions = TTLCache(
+    maxsize=PRINCIPAL_CACHE_SIZE,
+    ttl=PRINCIPAL_CACHE_TTL_SECONDS,
+)
+# concurrent cache misses for one principal share a single query
+principal_lookups = SingleFlight()
+# lookups of different users that arrive together are read with one query;
+# loaders are shared by all repositories of a database and are dropped on
+# (re)connection together with the principal cache
+user_loaders: Dict[tuple, BatchLoader] = {}
+
+
+def _principal_key(first_name: str, last_name: str) -> tuple:
+    return ('name', first_name, last_name)
+
+
+def _principal_id_key(user_id: str) -> tuple:
+    return ('id', user_id)
+
+
+def _principal_keys(user: User) -> Tuple[tuple, tuple]:
+    return (
+        _principal_id_key(str(user.id)),
+        _principal_key(user.first_name, user.last_name),
+    )
+
+
+def _mark_written(user: User, version: int) -> None:
+    for key in _principal_keys(user):
+        written = principal_versions.get(key)
+        if written is None or written[0] != user.id or written[1] < version:
+            principal_versions.set(key, (user.id, version))
+
+
+def _is_outdated(user: User) -> bool:
+    for key in _principal_keys(user):
+        written = principal_versions.get(key)
+        if written is not None and written[0] == user.id and (
+            user.version < written[1]
+        ):
+            return True
+
+    return False
+
+
+def forget_principal(user: User) -> None:
+    principal_cache.pop(_principal_id_key(str(user.id)))
+    principal_cache.pop(_principal_key(user.first_name, user.last_name))
+    # every write bumps the version, lookups still reading this one
+    # must not cache it afterwards
+    _mark_written(user, user.version + 1)
+    # stateless tokens stamped with this version must not be trusted
+    revoked_versions.revoke(user.id, user.version)
+
+
+def remember_principal(user: User) -> None:
+    if _is_outdated(user):
+        return
+
+    if user.hashed_pass:
+        user = user.copy(update={'hashed_pass': ''})
+
+    principal_cache.set(_principal_id_key(str(user.id)), user)
+    principal_cache.set(_principal_key(user.first_name, user.last_name), user)
+
+
+def refresh_principal(previous: User, updated: User) -> User:
+    forget_principal(previous)
+    # ``previous`` may be a cached copy older than the version replaced
+    revoked_versions.revoke(updated.id, updated.version - 1)
+    _mark_written(updated, updated.version)
+    remember_principal(updated)
+
+    return updated
+
+
+def _set_and_bump(data: dict) -> dict:
+    # profile ETags are derived from the version, see app.api.responses
+    return {'$set': data, '$inc': {'version': 1}}
 
 
+def _write_errors(bulk_error: BulkWriteError) -> Dict[int, str]:
+    return {
+        write_error['index']: (
+            "user already exists"
+            if write_error['code'] == DUPLICATE_KEY_ERROR
+            else write_error['errmsg']
+        )
+        for write_error in bulk_error.details['writeErrors']
+    }
+
+
+@timed_methods("db")
 class UsersRepository(BaseRepository):
+    collection_name = MONGO_USERS_COLLECTION
+    indexes = [
+        IndexModel(
+            [('first_name', ASCENDING), ('last_name', ASCENDING)],
+            name='first_name_last_name',
+            unique=True,
+            background=True,
+        ),
+        # keyset pagination of the admin listing for each filter shape
+        IndexModel(
+            [('role', ASCENDING), ('_id', ASCENDING)],
+            name='role_id',
+            background=True,
+        ),
+        IndexModel(
+            [('is_active', ASCENDING), ('_id', ASCENDING)],
+            name='is_active_id',
+            background=True,
+        ),
+        IndexModel(
+            [
+                ('role', ASCENDING),
+                ('is_active', ASCENDING),
+                ('_id', ASCENDING),
+            ],
+            name='role_is_active_id',
+            background=True,
+        ),
+    ]
+
     def __init__(self, client: AsyncIOMotorDatabase):
         super().__init__(client)
-        self.collection = self.connection[MONGO_USERS_COLLECTION]
+        self.collection = self.connection[self.collection_name]
 
-    async def get_user_by_id(
+    async def _find_user(
         self,
-        user_id: str
+        query: dict,
+        projection: Optional[dict] = None,
     ) -> User:
         user = await self.collection.find_one(
-            filter={'_id': ObjectId(user_id)}
+            filter=query,
+            projection=projection,
         )
 
         if user:
-            return User(**user)
+            return User.from_mongo_trusted(user)
 
         raise EntityDoesNotExist(
             "user does not exist"
         )
 
+    def _get_loader(self, by_field: str, with_password: bool) -> BatchLoader:
+        # Motor databases define __eq__ without __hash__, so the database
+        # is told apart by name; there is one client per process
+        loader_key = (
+            self.connection.name,
+            self.collection_name,
+            by_field,
+            with_password,
+        )
+        loader = user_loaders.get(loader_key)
+
+        if loader is None:
+            find_many = (
+                self.get_users_by_ids
+                if by_field == 'id'
+                else self.get_users_by_first_last_names
+            )
+            loader = BatchLoader(
+                partial(find_many, with_password=with_password),
+                max_batch_size=USER_LOOKUP_BATCH_SIZE,
+                window=USER_LOOKUP_BATCH_WINDOW_MS / 1000,
+            )
+            user_loaders[loader_key] = loader
+
+        return loader
+
+    async def _load_user(
+        self,
+        by_field: str,
+        key: Hashable,
+        with_password: bool,
+    ) -> User:
+        user = await self._get_loader(by_field, with_password).load(key)
+
+        if user is None:
+            raise EntityDoesNotExist(
+                "user does not exist"
+            )
+
+        return user
+
+    async def get_user_by_id(
+        self,
+        user_id: str,
+        *,
+        with_password: bool = True,
+    ) -> User:
+        if USER_LOOKUP_BATCH_SIZE > 1:
+            return await self._load_user(
+                'id',
+                ObjectId(user_id),
+                with_password,
+            )
+
+        return await self._find_user(
+            {'_id': ObjectId(user_id)},
+            projection=None if with_password else PRINCIPAL_PROJECTION,
+        )
+
     async def get_user_by_first_last_name(
         self,
         first_name,
-        last_name
+        last_name,
+        *,
+        with_password: bool = True,
     ) -> User:
-        user = await self.collection.find_one(
-            filter={'first_name': first_name, 'last_name': last_name}
+        if USER_LOOKUP_BATCH_SIZE > 1:
+            return await self._load_user(
+                'name',
+                (first_name, last_name),
+                with_password,
+            )
+
+        return await self._find_user(
+            {'first_name': first_name, 'last_name': last_name},
+            projection=None if with_password else PRINCIPAL_PROJECTION,
         )
 
-        if user:
-            return User(**user)
+    async def get_users_by_ids(
+        self,
+        user_ids: Collection[ObjectId],
+        *,
+        with_password: bool = True,
+    ) -> Dict[ObjectId, User]:
+        cursor = self.collection.find(
+            {'_id': {'$in': list(user_ids)}},
+            projection=None if with_password else PRINCIPAL_PROJECTION,
+        )
+        users = [User.from_mongo_trusted(user) async for user in cursor]
 
-        raise EntityDoesNotExist(
-            "user does not exist"
+        return {user.id: user for user in users}
+
+    async def get_users_by_first_last_names(
+        self,
+        names: Collection[Tuple[str, str]],
+        *,
+        with_password: bool = True,
+    ) -> Dict[Tuple[str, str], User]:
+        cursor = self.collection.find(
+            {
+                '$or': [
+                    {'first_name': first_name, 'last_name': last_name}
+                    for first_name, last_name in names
+                ],
+            },
+            projection=None if with_password else PRINCIPAL_PROJECTION,
+        )
+        users = [User.from_mongo_trusted(user) async for user in cursor]
+
+        return {(user.first_name, user.last_name): user for user in users}
+
+    async def get_name_owners(
+        self,
+        names: Collection[Tuple[str, str]],
+    ) -> Dict[Tuple[str, str], ObjectId]:
+        if not names:
+            return {}
+
+        cursor = self.collection.find(
+            {
+                '$or': [
+                    {'first_name': first_name, 'last_name': last_name}
+                    for first_name, last_name in names
+                ],
+            },
+            projection=NAME_OWNER_PROJECTION,
+        )
+
+        return {
+            (owner['first_name'], owner['last_name']): owner['_id']
+            async for owner in cursor
+        }
+
+    async def _lookup_principal(
+        self,
+        key: tuple,
+        fetch: Callable[[], Awaitable[User]],
+    ) -> User:
+        user = principal_cache.get(key)
+
+        if user is None:
+            user = await principal_lookups.do(
+                key,
+                partial(self._fetch_principal, fetch),
+            )
+
+        return user
+
+    @staticmethod
+    async def _fetch_principal(fetch: Callable[[], Awaitable[User]]) -> User:
+        user = await fetch()
+        remember_principal(user)
+
+        return user
+
+    async def get_principal_by_id(
+        self,
+        user_id: str,
+    ) -> User:
+        return await self._lookup_principal(
+            _principal_id_key(user_id),
+            partial(self.get_user_by_id, user_id, with_password=False),
+        )
+
+    async def get_principal_by_first_last_name(
+        self,
+        first_name: str,
+        last_name: str,
+    ) -> User:
+        return await self._lookup_principal(
+            _principal_key(first_name, last_name),
+            partial(
+                self.get_user_by_first_last_name,
+                first_name=first_name,
+                last_name=last_name,
+                with_password=False,
+            ),
+        )
+
+    async def list_users(
+        self,
+        *,
+        limit: int,
+        after: Optional[ObjectId] = None,
+        role: Optional[str] = None,
+        is_active: Optional[bool] = None,
+    ) -> List[User]:
+        query: dict = {}
+
+        if after is not None:
+            query['_id'] = {'$gt': after}
+        if role is not None:
+            query['role'] = role
+        if is_active is not None:
+            query['is_active'] = is_active
+
+        cursor = self.collection.find(
+            query,
+            projection=PRINCIPAL_PROJECTION,
+            sort=[('_id', ASCENDING)],
+            limit=limit,
+        )
+
+        return [User.from_mongo_trusted(user) async for user in cursor]
+
+    async def iter_users(
+        self,
+        *,
+        batch_size: int,
+    ) -> AsyncIterator[dict]:
+        cursor = self.collection.find(
+            {},
+            projection=EXPORT_PROJECTION,
+            batch_size=batch_size,
         )
 
+        async for user in cursor:
+            yield user
+
     async def create_user(
         self,
         user_registration: UserCreate
@@ -53,34 +422,97 @@ class UsersRepository(BaseRepository):
             **user_registration.dict()
         )
 
-        user.set_password_hash(user_registration.password)
+        user.hashed_pass = await passwords.get_password_hash(
+            user_registration.password
+        )
 
         user.is_active = False
 
-        result = await self.collection.insert_one(
-            document=user.dict(exclude={"id"})
-        )
+        user_id = await self._insert_user(user.dict(exclude={"id"}))
 
-        user_db = User(
-            **user.dict(exclude={"id"}),
-            id=result.inserted_id
-        )
+        user_db = user.copy(update={"id": user_id})
+
+        remember_principal(user_db)
 
         return user_db
 
+    async def _insert_user(self, document: dict) -> ObjectId:
+        try:
+            result = await self.collection.insert_one(document=document)
+        except DuplicateKeyError as duplicate_error:
+            raise EntityAlreadyExists(
+                "user already exists"
+            ) from duplicate_error
+
+        return result.inserted_id
+
+    async def insert_users(
+        self,
+        users: Sequence[User],
+    ) -> Dict[int, str]:
+        """Insert already hashed users in one unordered batch.
+
+        Returns the reason every rejected user was not inserted, keyed by
+        its position in ``users``; the rest of the batch is still written.
+        """
+        try:
+            await self.collection.insert_many(
+                [user.dict(exclude={"id"}) for user in users],
+                ordered=False,
+            )
+        except BulkWriteError as bulk_error:
+            return _write_errors(bulk_error)
+
+        return {}
+
     async def update_by_fields(
         self,
         user: User,
         data: dict,
     ) -> User:
 
-        updated = await self.collection.find_one_and_update(
-            filter={'_id': user.id},
-            update={'$set': data},
-            return_document=ReturnDocument.AFTER
+        updated = await self._find_one_and_set(user, data)
+
+        return refresh_principal(user, User.from_mongo_trusted(updated))
+
+    async def update_login_times(
+        self,
+        login_times: Dict[ObjectId, datetime],
+    ) -> None:
+        # $max keeps the latest time when several processes flush
+        await self.collection.bulk_write(
+            [
+                UpdateOne(
+                    {'_id': user_id},
+                    {'$max': {'last_login': login_time}},
+                )
+                for user_id, login_time in login_times.items()
+            ],
+            ordered=False,
         )
 
-        return User(**updated)
+    async def update_users(
+        self,
+        updates: Sequence[Tuple[ObjectId, dict]],
+    ) -> Dict[int, str]:
+        """Set fields on many users with one unordered ``bulk_write``.
+
+        Returns the reason every rejected update failed, keyed by its
+        position in ``updates``; the other updates are still applied.
+        Callers forget the cached principals of the updated users.
+        """
+        try:
+            await self.collection.bulk_write(
+                [
+                    UpdateOne({'_id': user_id}, _set_and_bump(data))
+                    for user_id, data in updates
+                ],
+                ordered=False,
+            )
+        except BulkWriteError as bulk_error:
+            return _write_errors(bulk_error)
+
+        return {}
 
     async def update_user(
         self,
@@ -89,17 +521,29 @@ class UsersRepository(BaseRepository):
     ) -> User:
 
         doc_to_be_updated = user_update.dict(
-            exclude_unset=True
+            exclude_unset=True,
+            exclude={'password'},
         )
 
         if user_update.password:
-            user.set_password_hash(user_update.password)
-            doc_to_be_updated['hashed_pass'] = user.hashed_pass
+            doc_to_be_updated['hashed_pass'] = (
+                await passwords.get_password_hash(user_update.password)
+            )
 
-        updated = await self.collection.find_one_and_update(
-            filter={'_id': user.id},
-            update={'$set': doc_to_be_updated},
-            return_document=ReturnDocument.AFTER
-        )
+        updated = await self._find_one_and_set(user, doc_to_be_updated)
+
+        return refresh_principal(user, User.from_mongo_trusted(updated))
 
-        return User(**updated)
+    async def _find_one_and_set(self, user: User, data: dict) -> dict:
+        # the unique name index is what rejects renames onto a taken name
+        try:
+            return await self.collection.find_one_and_update(
+                filter={'_id': user.id},
+                update=_set_and_bump(data),
+                projection=PRINCIPAL_PROJECTION,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError as duplicate_error:
+            raise EntityAlreadyExists(
+                "user already exists"
+            ) from duplicate_error
@@ -3,10 +3,14 @@ from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException
 
 from app.api.errors.errors import (http_error_handler,
+                                   http_overloaded_error_handler,
                                    http_validation_error_handler)
 from app.api.routes.api import router as api_router
+from app.api.routes.metrics import router as metrics_router
 from app.core.config import API_PREFIX, DEBUG, PROJECT_NAME, VERSION
 from app.core.events import create_start_app_handler, create_stop_app_handler
+from app.core.timing import ServerTimingMiddleware
+from app.services.passwords import HashingPoolOverloaded
 
 
 def get_application() -> FastAPI:
@@ -21,7 +25,10 @@ def get_application() -> FastAPI:
         create_stop_app_handler(application)
     )
 
+    application.add_middleware(ServerTimingMiddleware)
+
     application.include_router(api_router, prefix=API_PREFIX)
+    application.include_router(metrics_router)
 
     application.add_exception_handler(
         HTTPException,
@@ -31,6 +38,10 @@ def get_application() -> FastAPI:
         RequestValidationError,
         http_validation_error_handler
     )
+    application.add_exception_handler(
+        HashingPoolOverloaded,
+        http_overloaded_error_handler
+    )
 
     return application
 
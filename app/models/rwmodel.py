@@ -34,6 +34,31 @@ class MongoModel(BaseModel):
         id = data.pop('_id', None)
         return cls(**dict(data, id=id))
 
+    @classmethod
+    def from_mongo_trusted(cls, data: dict):
+        """Build from a stored document without running validators.
+
+        Only for documents this application wrote itself: client input
+        must keep going through regular validation. Fields that are
+        missing, or None where None is not accepted (like documents
+        stored before a field got a default), get the field default.
+        """
+        values = {}
+
+        for name, field in cls.__fields__.items():
+            value = data.get(field.alias)  # noqa: WPS110
+
+            if value is None and (
+                field.alias not in data or not field.allow_none
+            ):
+                if field.required:
+                    continue
+                value = field.get_default()  # noqa: WPS110
+
+            values[name] = value
+
+        return cls.construct(**values)
+
     def mongo(self, **kwargs):
         exclude_unset = kwargs.pop('exclude_unset', True)
         by_alias = kwargs.pop('by_alias', True)
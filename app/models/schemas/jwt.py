@@ -2,12 +2,28 @@ from datetime import datetime
 
 from pydantic import BaseModel
 
+from app.models.rwmodel import OID
+
+LEGACY_TOKEN_VERSION = 1
+TOKEN_VERSION = 2
+
 
 class JWTMeta(BaseModel):
     exp: datetime
+    iat: datetime = None
     sub: str
+    # tokens issued before versioning carry no "ver" claim
+    ver: int = LEGACY_TOKEN_VERSION
 
 
 class JWTUser(BaseModel):
+    # taken from "sub", legacy tokens only identify the user by name
+    id: OID = None
     first_name: str
     last_name: str
+    # claims for stateless authentication, absent from older tokens
+    role: str = None
+    is_active: bool = None
+    version: int = None
+    # taken from "iat"
+    issued_at: datetime = None
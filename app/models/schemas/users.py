@@ -1,4 +1,6 @@
 from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List
 
 from pydantic import BaseModel, Field, validator
 
@@ -53,3 +55,59 @@ class UserProfile(MongoModel):
     created_at: datetime
     last_login: datetime = None
     token: str = None
+
+    @classmethod
+    def from_user(cls, user, token: str = None) -> "UserProfile":
+        # user is an already validated app.models.users.User
+        return cls.construct(
+            id=user.id,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            role=user.role,
+            is_active=user.is_active,
+            created_at=user.created_at,
+            last_login=user.last_login,
+            token=token,
+        )
+
+
+class UsersPage(BaseModel):
+    users: List[UserProfile]
+    # opaque, pass back as ``cursor`` to get the next page
+    next_cursor: str = None
+
+
+class UserBatchUpdateFields(UserUpdate):
+    # written with a bulk update, so names follow the User rules here
+    first_name: str = Field(None, min_length=3, max_length=50)
+    last_name: str = Field(None, min_length=3, max_length=50)
+
+    _validate_names = validator(
+        'first_name',
+        'last_name',
+        allow_reuse=True
+    )(validators.name_must_not_contain_space)
+
+
+class UserBatchUpdate(BaseModel):
+    id: str
+    # validated one by one, see app.services.users.update_users_by_id
+    user: Dict[str, Any]
+
+
+class BatchUpdateStatus(str, Enum):  # noqa: WPS600
+    updated = "updated"
+    invalid = "invalid"
+    not_found = "not_found"
+    conflict = "conflict"
+
+
+class UserBatchUpdateResult(BaseModel):
+    id: str
+    status: BatchUpdateStatus
+    detail: str = None
+
+
+class UsersBatchUpdateResult(BaseModel):
+    # in the order the operations were sent
+    results: List[UserBatchUpdateResult]
@@ -4,7 +4,6 @@ from pydantic import Field, validator
 
 from app.models import validators
 from app.models.rwmodel import OID, MongoModel
-from app.services import security
 
 
 class User(MongoModel):
@@ -13,9 +12,11 @@ class User(MongoModel):
     last_name: str = Field(min_length=3, max_length=50)
     role: str
     is_active: bool = False
-    created_at: datetime = None
+    created_at: datetime = Field(default_factory=datetime.now)
     last_login: datetime = None
     hashed_pass: str = ''
+    # incremented by every profile update, see app.api.responses.make_etag
+    version: int = 0
 
     _validate_names = validator(
         'first_name',
@@ -28,15 +29,10 @@ class User(MongoModel):
         allow_reuse=True
     )(validators.validate_role)
 
-    @validator("created_at", pre=True)
+    # documents written before the default existed hold None
+    @validator("created_at", pre=True, always=True)
     def default_datetime(
             cls,  # noqa: N805
             value: datetime,  # noqa: WPS110
     ) -> datetime:
         return value or datetime.now()
-
-    def check_password(self, password: str) -> bool:
-        return security.verify_password(password, self.hashed_pass)
-
-    def set_password_hash(self, password: str) -> None:
-        self.hashed_pass = security.get_password_hash(password)
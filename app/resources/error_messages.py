@@ -1,2 +1,10 @@
 USER_EXIST = "user already exist"
 LOGIN_FAILED = "incorrect user login data"
+SERVICE_OVERLOADED = "service is overloaded, retry later"
+INVALID_CURSOR = "malformed page cursor"
+BATCH_TOO_LARGE = "too many operations in one batch"
+INVALID_USER_ID = "malformed user id"
+USER_DOES_NOT_EXIST = "user does not exist"
+PASSWORD_UPDATE_FORBIDDEN = "password can not be changed by an admin"
+EMPTY_UPDATE = "nothing to update"
+DUPLICATE_OPERATION = "user is updated more than once in the batch"
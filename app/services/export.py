@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+from typing import AsyncIterator, Dict, List
+
+from app.db.repositories.users import EXPORT_FIELDS, UsersRepository
+
+
+class ExportFormat(str, Enum):  # noqa: WPS600
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def _export_row(user: dict) -> Dict[str, object]:
+    row = {field: user.get(field) for field in EXPORT_FIELDS}
+    row['id'] = str(user['_id'])
+
+    for field in ('created_at', 'last_login'):
+        if isinstance(row[field], datetime):
+            row[field] = row[field].isoformat()
+
+    return row
+
+
+def _render_ndjson(rows: List[Dict[str, object]]) -> bytes:
+    return "".join(
+        json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n"
+        for row in rows
+    ).encode("utf-8")
+
+
+def _render_csv(rows: List[Dict[str, object]], header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+
+    return buffer.getvalue().encode("utf-8")
+
+
+async def export_users(
+        users_repo: UsersRepository,
+        export_format: ExportFormat,
+        batch_size: int,
+) -> AsyncIterator[bytes]:
+    """Yield the users collection encoded as NDJSON or CSV.
+
+    Output is produced one cursor batch at a time, so memory use does
+    not depend on the collection size.
+    """
+    rows: List[Dict[str, object]] = []
+    header = True
+
+    async for user in users_repo.iter_users(batch_size=batch_size):
+        rows.append(_export_row(user))
+
+        if len(rows) < batch_size:
+            continue
+
+        if export_format == ExportFormat.csv:
+            yield _render_csv(rows, header)
+            header = False
+        else:
+            yield _render_ndjson(rows)
+        rows = []
+
+    if export_format == ExportFormat.csv:
+        if rows or header:
+            yield _render_csv(rows, header)
+    elif rows:
+        yield _render_ndjson(rows)
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import os
+from concurrent.futures import Executor
+from datetime import datetime
+from typing import Dict, List, Sequence, Tuple
+
+from pydantic import ValidationError
+
+from app.db.repositories.users import UsersRepository
+from app.models.schemas.users import UserCreate
+from app.models.users import User
+from app.services import security
+
+# (line number, raw NDJSON line)
+Record = Tuple[int, str]
+# (line number, reason the record was not imported)
+Failure = Tuple[int, str]
+
+
+def _hash_all(passwords: Sequence[str]) -> List[str]:
+    return [security.get_password_hash(password) for password in passwords]
+
+
+def _parse_record(line: str) -> UserCreate:
+    try:
+        return UserCreate(**json.loads(line))
+    except json.JSONDecodeError as decode_error:
+        raise ValueError("malformed JSON") from decode_error
+    except TypeError as type_error:
+        raise ValueError("record is not an object") from type_error
+    except ValidationError as validation_error:
+        raise ValueError(
+            "; ".join(
+                "{0}: {1}".format(
+                    ".".join(str(loc) for loc in error["loc"]),
+                    error["msg"],
+                )
+                for error in validation_error.errors()
+            ),
+        ) from validation_error
+
+
+class ImportProgress:
+    """Counters of an import that are persisted in its checkpoint.
+
+    ``line`` is the number of input lines fully handled, a resumed
+    import skips that many lines.
+    """
+
+    def __init__(
+            self,
+            line: int = 0,
+            inserted: int = 0,
+            conflicts: int = 0,
+            invalid: int = 0,
+    ) -> None:
+        self.line = line
+        self.inserted = inserted
+        self.conflicts = conflicts
+        self.invalid = invalid
+
+    @classmethod
+    def load(cls, path: str) -> "ImportProgress":
+        if not os.path.exists(path):
+            return cls()
+
+        with open(path) as checkpoint:
+            return cls(**json.load(checkpoint))
+
+    def save(self, path: str) -> None:
+        # written aside and renamed so a crash never leaves half a file
+        temporary_path = "{0}.tmp".format(path)
+        with open(temporary_path, "w") as checkpoint:
+            json.dump(self.__dict__, checkpoint)
+        os.replace(temporary_path, path)
+
+
+class UsersImporter:
+    """Imports batches of NDJSON user records.
+
+    Every record is validated as a ``UserCreate``, passwords of a batch
+    are hashed across the executor's workers, and valid users are written
+    with one unordered ``insert_many``. Records that fail validation or
+    clash with an existing user are reported and skipped.
+    """
+
+    def __init__(
+            self,
+            users_repo: UsersRepository,
+            executor: Executor,
+            workers: int,
+    ) -> None:
+        self.users_repo = users_repo
+        self.executor = executor
+        self.workers = workers
+
+    async def _hash_passwords(self, passwords: List[str]) -> List[str]:
+        loop = asyncio.get_running_loop()
+        slice_size = -(-len(passwords) // self.workers)  # ceiling division
+
+        hashed_slices = await asyncio.gather(*(
+            loop.run_in_executor(
+                self.executor,
+                _hash_all,
+                passwords[start:start + slice_size],
+            )
+            for start in range(0, len(passwords), slice_size)
+        ))
+
+        return [hashed for part in hashed_slices for hashed in part]
+
+    async def import_batch(
+            self,
+            records: Sequence[Record],
+            progress: ImportProgress,
+    ) -> List[Failure]:
+        failures: List[Failure] = []
+        valid: List[Tuple[int, UserCreate]] = []
+
+        for line_number, line in records:
+            if not line.strip():
+                continue
+            try:
+                valid.append((line_number, _parse_record(line)))
+            except ValueError as parse_error:
+                failures.append((line_number, str(parse_error)))
+
+        progress.invalid += len(failures)
+
+        if valid:
+            hashes = await self._hash_passwords(
+                [user_create.password for _, user_create in valid],
+            )
+            created_at = datetime.now()
+            users = [
+                User(
+                    **user_create.dict(exclude={"password"}),
+                    hashed_pass=hashed_pass,
+                    is_active=False,
+                    created_at=created_at,
+                )
+                for (_, user_create), hashed_pass in zip(valid, hashes)
+            ]
+
+            rejected: Dict[int, str] = await self.users_repo.insert_users(
+                users,
+            )
+            failures.extend(
+                (valid[index][0], reason)
+                for index, reason in rejected.items()
+            )
+
+            progress.conflicts += len(rejected)
+            progress.inserted += len(users) - len(rejected)
+
+        progress.line = records[-1][0]
+
+        return sorted(failures)
+
@@ -1,44 +1,230 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
-from typing import Dict
+from typing import Dict, Hashable, Optional
 
 import jwt
 from pydantic import ValidationError
 
-from app.models.schemas.jwt import JWTMeta, JWTUser
+from app.core.cache import TTLCache
+from app.core.config import (ACCEPT_LEGACY_TOKENS,
+                             ACCESS_TOKEN_REFRESH_THRESHOLD_MINUTES,
+                             ISSUED_TOKEN_CACHE_SIZE,
+                             REJECTED_TOKEN_CACHE_SIZE,
+                             REJECTED_TOKEN_CACHE_TTL_SECONDS,
+                             STATELESS_AUTH_MAX_AGE_SECONDS,
+                             VERIFIED_TOKEN_CACHE_SIZE)
+from app.core.timing import timed
+from app.models.schemas.jwt import TOKEN_VERSION, JWTMeta, JWTUser
 from app.models.users import User
+from app.services.revocation import revoked_versions
 
-JWT_SUBJECT = "access"
+JWT_SUBJECT = "access"  # subject of legacy tokens
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # one week
 
+verified_tokens = TTLCache(
+    maxsize=VERIFIED_TOKEN_CACHE_SIZE,
+    ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+rejected_tokens = TTLCache(
+    maxsize=REJECTED_TOKEN_CACHE_SIZE,
+    ttl=REJECTED_TOKEN_CACHE_TTL_SECONDS,
+)
+issued_tokens = TTLCache(
+    maxsize=ISSUED_TOKEN_CACHE_SIZE,
+    ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
 
+
+@timed("jwt")
 def create_jwt_token(
     *,
     jwt_content: Dict[str, str],
     secret_key: str,
     expires_delta: timedelta,
+    subject: str,
 ) -> str:
     to_encode = jwt_content.copy()
-    expire = datetime.utcnow() + expires_delta
-    to_encode.update(JWTMeta(exp=expire, sub=JWT_SUBJECT).dict())
+    issued_at = datetime.utcnow()
+    to_encode.update(
+        JWTMeta(
+            exp=issued_at + expires_delta,
+            iat=issued_at,
+            sub=subject,
+            ver=TOKEN_VERSION,
+        ).dict(),
+    )
     return jwt.encode(to_encode, secret_key, algorithm=ALGORITHM)
 
 
 def create_access_token_for_user(user: User, secret_key: str) -> str:
+    # Names stay in the payload so that instances still running the
+    # legacy format can read tokens issued by this one.
     return create_jwt_token(
-        jwt_content=JWTUser(
-            first_name=user.first_name,
-            last_name=user.last_name,
-        ).dict(),
+        jwt_content=_jwt_user(user).dict(exclude={'id', 'issued_at'}),
         secret_key=secret_key,
         expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES),
+        subject=str(user.id),
+    )
+
+
+def _jwt_user(user: User) -> JWTUser:
+    return JWTUser(
+        id=user.id,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        role=user.role,
+        is_active=user.is_active,
+        version=user.version,
+    )
+
+
+def _identity_key(jwt_user: JWTUser, secret_key: str) -> Hashable:
+    # every claim is part of the identity, a changed user gets a new token
+    return (
+        secret_key,
+        str(jwt_user.id),
+        jwt_user.first_name,
+        jwt_user.last_name,
+        jwt_user.role,
+        jwt_user.is_active,
+        jwt_user.version,
+    )
+
+
+def _remember_issued_token(
+    jwt_user: JWTUser,
+    token: str,
+    secret_key: str,
+    expires_at: float,
+    issued_at: float,
+) -> None:
+    # The entry expires as soon as the token crosses the refresh
+    # threshold, so whatever is cached is always still worth handing out.
+    now = time.time()
+    ttl = expires_at - now - ACCESS_TOKEN_REFRESH_THRESHOLD_MINUTES * 60
+
+    if STATELESS_AUTH_MAX_AGE_SECONDS:
+        # and while it is still young enough for stateless authentication
+        ttl = min(ttl, issued_at + STATELESS_AUTH_MAX_AGE_SECONDS - now)
+
+    issued_tokens.set(_identity_key(jwt_user, secret_key), token, ttl=ttl)
+
+
+def get_access_token_for_user(user: User, secret_key: str) -> str:
+    """Return a valid token for the user, minting one only when needed.
+
+    A new token is created when no token for the user's identity
+    (id, names, role, activity and version) is known or when the known
+    one is close to expiry. Callers still holding a legacy token get a
+    current one.
+    """
+    jwt_user = _jwt_user(user)
+
+    token = issued_tokens.get(_identity_key(jwt_user, secret_key))
+    if token is not None:
+        return token
+
+    issued_at = time.time()
+    token = create_access_token_for_user(user, secret_key)
+    _remember_issued_token(
+        jwt_user,
+        token,
+        secret_key,
+        expires_at=issued_at + ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        issued_at=issued_at,
     )
 
+    return token
 
+
+def _token_cache_key(token: str, secret_key: str) -> Hashable:
+    # Tokens come straight from a request header, so only a fixed size
+    # digest of the whole token is kept instead of the token itself.
+    return secret_key, hashlib.sha256(token.encode()).digest()
+
+
+def _decode_jwt_user(token: str, secret_key: str) -> JWTUser:
+    payload = jwt.decode(token, secret_key, algorithms=[ALGORITHM])
+    meta = JWTMeta(**payload)
+
+    if meta.ver >= TOKEN_VERSION:
+        jwt_user = JWTUser(**payload, id=meta.sub, issued_at=meta.iat)
+    elif ACCEPT_LEGACY_TOKENS:
+        jwt_user = JWTUser(**payload)
+    else:
+        raise jwt.InvalidTokenError("legacy token format is not accepted")
+
+    verified_tokens.set(
+        _token_cache_key(token, secret_key),
+        jwt_user,
+        ttl=payload["exp"] - time.time(),
+    )
+    _remember_issued_token(
+        jwt_user,
+        token,
+        secret_key,
+        expires_at=payload["exp"],
+        issued_at=payload.get("iat", 0),
+    )
+
+    return jwt_user
+
+
+@timed("jwt")
 def get_jwt_user_from_token(token: str, secret_key: str) -> JWTUser:
+    cache_key = _token_cache_key(token, secret_key)
+
+    jwt_user = verified_tokens.get(cache_key)
+    if jwt_user is not None:
+        return jwt_user
+
+    rejection = rejected_tokens.get(cache_key)
+    if rejection is not None:
+        raise ValueError(rejection)
+
     try:
-        return JWTUser(**jwt.decode(token, secret_key, algorithms=[ALGORITHM]))
+        return _decode_jwt_user(token, secret_key)
     except jwt.PyJWTError as decode_error:
-        raise ValueError("unable to decode JWT token") from decode_error
+        rejection = "unable to decode JWT token"
+        rejected_tokens.set(cache_key, rejection)
+        raise ValueError(rejection) from decode_error
     except ValidationError as validation_error:
-        raise ValueError("malformed payload in token") from validation_error
+        rejection = "malformed payload in token"
+        rejected_tokens.set(cache_key, rejection)
+        raise ValueError(rejection) from validation_error
+
+
+def get_stateless_user(jwt_user: JWTUser) -> Optional[User]:
+    """Build the principal from token claims alone when they are trusted.
+
+    Claims are trusted while the token is younger than
+    STATELESS_AUTH_MAX_AGE_SECONDS and the version it was issued for has
+    not been revoked. The user carries nothing the token does not, so
+    fields like ``created_at`` are unset. Returns ``None`` otherwise.
+    """
+    if (
+        not STATELESS_AUTH_MAX_AGE_SECONDS
+        or jwt_user.issued_at is None
+        or jwt_user.version is None
+        or jwt_user.role is None
+    ):
+        return None
+
+    age = time.time() - jwt_user.issued_at.timestamp()
+    if age > STATELESS_AUTH_MAX_AGE_SECONDS:
+        return None
+
+    if revoked_versions.is_revoked(jwt_user.id, jwt_user.version):
+        return None
+
+    return User.construct(
+        id=jwt_user.id,
+        first_name=jwt_user.first_name,
+        last_name=jwt_user.last_name,
+        role=jwt_user.role,
+        is_active=jwt_user.is_active,
+        version=jwt_user.version,
+        hashed_pass='',
+    )
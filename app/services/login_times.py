@@ -0,0 +1,93 @@
+import asyncio
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from bson import ObjectId
+from loguru import logger
+from pymongo.errors import PyMongoError
+
+from app.db.repositories.users import UsersRepository
+
+
+class LastLoginWriter:
+    """Write-behind buffer for ``last_login`` updates.
+
+    Logins only record the time in memory; the latest time per user is
+    written with a single ``bulk_write`` every ``interval`` seconds, or
+    sooner once ``batch_size`` users are pending. A crash loses at most
+    the logins of the current interval.
+    """
+
+    def __init__(
+            self,
+            users_repo: UsersRepository,
+            interval: float,
+            batch_size: int,
+    ) -> None:
+        self.users_repo = users_repo
+        self.interval = interval
+        self.batch_size = batch_size
+
+        self._pending: Dict[ObjectId, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._flushes: Set[asyncio.Future] = set()
+
+        self.flushed = 0
+        self.failed_flushes = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def add(self, user_id: ObjectId, login_time: datetime) -> None:
+        self._pending[user_id] = login_time
+
+        if len(self._pending) >= self.batch_size:
+            flush = asyncio.ensure_future(self.flush())
+            self._flushes.add(flush)
+            flush.add_done_callback(self._flushes.discard)
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, {}
+
+        try:
+            await self.users_repo.update_login_times(batch)
+        except PyMongoError as flush_error:
+            self.failed_flushes += 1
+            logger.warning(
+                "Flushing {0} login times failed: {1}",
+                len(batch),
+                flush_error,
+            )
+            # keep times recorded while the write was in flight
+            batch.update(self._pending)
+            self._pending = batch
+        else:
+            self.flushed += len(batch)
+
+    async def _flush_periodically(self) -> None:
+        while True:  # noqa: WPS457
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def start(self) -> None:
+        self._task = asyncio.ensure_future(self._flush_periodically())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        await asyncio.gather(*self._flushes, return_exceptions=True)
+        await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self.pending,
+            "flushed": self.flushed,
+            "failed_flushes": self.failed_flushes,
+        }
@@ -0,0 +1,18 @@
+import base64
+import binascii
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+def encode_cursor(last_id: ObjectId) -> str:
+    return base64.urlsafe_b64encode(last_id.binary).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> ObjectId:
+    padding = "=" * (-len(cursor) % 4)
+
+    try:
+        return ObjectId(base64.urlsafe_b64decode(cursor + padding))
+    except (binascii.Error, InvalidId, TypeError, ValueError) as cursor_error:
+        raise ValueError("malformed cursor") from cursor_error
@@ -0,0 +1,145 @@
+import asyncio
+import time
+from concurrent.futures import (Executor, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import (PASSWORD_HASHING_EXECUTOR,
+                             PASSWORD_HASHING_QUEUE_SIZE,
+                             PASSWORD_HASHING_WORKERS)
+from app.core.timing import timed
+from app.services import security
+
+THREAD_EXECUTOR = "thread"
+PROCESS_EXECUTOR = "process"
+
+
+class HashingPoolOverloaded(Exception):
+    pass
+
+
+def _timed_call(func: Callable, *args: Any) -> Any:
+    return time.monotonic(), func(*args)
+
+
+class PasswordHashingPool:
+    """Runs bcrypt work outside of the event loop.
+
+    At most ``max_workers`` hashes run at the same time and at most
+    ``max_queue_size`` more wait for a free worker. Anything beyond that
+    is rejected with ``HashingPoolOverloaded`` instead of piling up.
+    """
+
+    def __init__(
+            self,
+            executor_kind: str,
+            max_workers: int,
+            max_queue_size: int,
+    ) -> None:
+        if executor_kind not in {THREAD_EXECUTOR, PROCESS_EXECUTOR}:
+            raise ValueError(
+                "unknown executor kind {0}".format(executor_kind)
+            )
+
+        self.executor_kind = executor_kind
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+
+        self.completed = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return max(self._in_flight - self.max_workers, 0)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == PROCESS_EXECUTOR:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="password-hashing",
+                )
+
+        return self._executor
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        if self._in_flight >= self.max_workers + self.max_queue_size:
+            self.rejected += 1
+            raise HashingPoolOverloaded("password hashing queue is full")
+
+        loop = asyncio.get_running_loop()
+        submitted_at = time.monotonic()
+
+        future = loop.run_in_executor(
+            self._get_executor(),
+            _timed_call,
+            func,
+            *args,
+        )
+        # the slot is held until the executor is done with the work, even
+        # if the request waiting for it is cancelled in the meantime
+        self._in_flight += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+        future.add_done_callback(self._release)
+
+        started_at, result = await asyncio.shield(future)
+
+        wait_time = max(started_at - submitted_at, 0.0)
+        self.completed += 1
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+
+        return result
+
+    def _release(self, _: asyncio.Future) -> None:
+        self._in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executor": self.executor_kind,
+            "workers": self.max_workers,
+            "queue_size": self.max_queue_size,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_time_total": self.wait_time_total,
+            "wait_time_max": self.wait_time_max,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+hashing_pool = PasswordHashingPool(
+    executor_kind=PASSWORD_HASHING_EXECUTOR,
+    max_workers=PASSWORD_HASHING_WORKERS,
+    max_queue_size=PASSWORD_HASHING_QUEUE_SIZE,
+)
+
+
+@timed("password")
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await hashing_pool.run(
+        security.verify_password,
+        plain_password,
+        hashed_password,
+    )
+
+
+@timed("password")
+async def get_password_hash(password: str) -> str:
+    return await hashing_pool.run(security.get_password_hash, password)
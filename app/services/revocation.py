@@ -0,0 +1,78 @@
+import time
+from typing import Any, Dict
+
+from app.core.bloom import BloomFilter
+from app.core.config import (REVOCATION_FILTER_CAPACITY,
+                             REVOCATION_FILTER_ERROR_RATE,
+                             STATELESS_AUTH_MAX_AGE_SECONDS)
+
+
+class RevokedVersions:
+    """Remembers which user versions were superseded by this process.
+
+    Stateless tokens are stamped with the version of the user they were
+    issued for; when that version is in here the claims are stale. Only
+    tokens younger than ``max_age`` are ever trusted, so the filter is
+    rotated every ``max_age`` seconds and only the current and previous
+    generation are kept. A false positive only costs a user lookup.
+    """
+
+    def __init__(
+            self,
+            capacity: int,
+            error_rate: float,
+            max_age: float,
+    ) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.max_age = max_age
+
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous = BloomFilter(capacity, error_rate)
+        self._rotated_at = time.monotonic()
+
+        self.revoked = 0
+        self.rotations = 0
+
+    @staticmethod
+    def _key(user_id: Any, version: int) -> str:
+        return "{0}:{1}".format(user_id, version)
+
+    def _rotate_if_due(self) -> None:
+        now = time.monotonic()
+        if now - self._rotated_at < self.max_age:
+            return
+
+        self._previous = (
+            self._current
+            if now - self._rotated_at < self.max_age * 2
+            else BloomFilter(self.capacity, self.error_rate)
+        )
+        self._current = BloomFilter(self.capacity, self.error_rate)
+        self._rotated_at = now
+        self.rotations += 1
+
+    def revoke(self, user_id: Any, version: int) -> None:
+        self._rotate_if_due()
+        self._current.add(self._key(user_id, version))
+        self.revoked += 1
+
+    def is_revoked(self, user_id: Any, version: int) -> bool:
+        self._rotate_if_due()
+        key = self._key(user_id, version)
+
+        return key in self._current or key in self._previous
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "revoked": self.revoked,
+            "rotations": self.rotations,
+            "current": self._current.stats(),
+        }
+
+
+revoked_versions = RevokedVersions(
+    capacity=REVOCATION_FILTER_CAPACITY,
+    error_rate=REVOCATION_FILTER_ERROR_RATE,
+    max_age=STATELESS_AUTH_MAX_AGE_SECONDS or 1,
+)
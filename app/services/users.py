@@ -1,21 +1,32 @@
+from collections import Counter
 from datetime import datetime
-
-from app.db.errors import EntityAlreadyExists
-from app.db.repositories.users import UsersRepository
-from app.models.schemas.users import UserUpdate
+from typing import Dict, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from pydantic import ValidationError
+
+from app.db.repositories.users import (UsersRepository, forget_principal,
+                                       remember_principal)
+from app.models.schemas.users import (BatchUpdateStatus, UserBatchUpdate,
+                                      UserBatchUpdateFields,
+                                      UserBatchUpdateResult, UserProfile,
+                                      UsersBatchUpdateResult, UserUpdate,
+                                      UsersPage)
 from app.models.users import User
-from app.services.authentication import check_first_last_name_is_taken
+from app.resources import error_messages
+from app.services.login_times import LastLoginWriter
+from app.services.pagination import decode_cursor, encode_cursor
 
 
-async def update_login_time(
+def update_login_time(
         user: User,
-        user_repo: UsersRepository
+        login_writer: LastLoginWriter,
 ):
     current_time = datetime.now()
-    await user_repo.update_by_fields(
-        user,
-        {'last_login': current_time}
-    )
+    login_writer.add(user.id, current_time)
+
+    # the database catches up on the next flush, cached reads right away
+    remember_principal(user.copy(update={'last_login': current_time}))
 
 
 async def activate_user(
@@ -43,15 +54,7 @@ async def _update_user(
         user_update: UserUpdate,
         users_repo: UsersRepository
 ):
-    if (user_update.first_name
-            and user_update.first_name != present_user.first_name):
-        if await check_first_last_name_is_taken(
-                users_repo,
-                user_update.first_name,
-                user_update.last_name,
-        ):
-            raise EntityAlreadyExists()
-
+    # raises EntityAlreadyExists when renaming onto a taken name
     user = await users_repo.update_user(
         user=present_user,
         user_update=user_update
@@ -77,10 +80,165 @@ async def update_user_by_id(
         user_update: UserUpdate,
         users_repo: UsersRepository,
 ) -> User:
-    present_user = await users_repo.get_user_by_id(user_id)
+    present_user = await users_repo.get_user_by_id(
+        user_id,
+        with_password=False,
+    )
 
     return await _update_user(
         present_user,
         user_update,
         users_repo
     )
+
+
+def _validation_reason(validation_error: ValidationError) -> str:
+    return "; ".join(
+        "{0}: {1}".format(
+            ".".join(str(part) for part in error["loc"]),
+            error["msg"],
+        )
+        for error in validation_error.errors()
+    )
+
+
+def _invalid_operation_reason(
+        operation: UserBatchUpdate,
+        seen_ids: Set[str],
+        data: Dict[str, dict],
+) -> Optional[str]:
+    """Validate one operation, storing its fields in ``data`` if valid."""
+    if not ObjectId.is_valid(operation.id):
+        return error_messages.INVALID_USER_ID
+    if operation.id in seen_ids:
+        return error_messages.DUPLICATE_OPERATION
+
+    seen_ids.add(operation.id)
+
+    try:
+        user_update = UserBatchUpdateFields(**operation.user)
+    except ValidationError as validation_error:
+        return _validation_reason(validation_error)
+
+    if user_update.password:
+        return error_messages.PASSWORD_UPDATE_FORBIDDEN
+
+    data[operation.id] = user_update.dict(
+        exclude_unset=True,
+        exclude_none=True,
+    )
+    if not data[operation.id]:
+        return error_messages.EMPTY_UPDATE
+
+    return None
+
+
+async def update_users_by_id(  # noqa: WPS210, WPS231
+        operations: List[UserBatchUpdate],
+        users_repo: UsersRepository,
+) -> UsersBatchUpdateResult:
+    """Apply many admin updates with a fixed number of queries.
+
+    Operations are validated first, then the targeted users and the
+    owners of every requested name are read with one query each, and all
+    remaining updates are written with one unordered ``bulk_write``. A
+    failed operation never stops the others.
+    """
+    outcomes: Dict[int, Tuple[BatchUpdateStatus, Optional[str]]] = {}
+    pending: Dict[int, Tuple[ObjectId, dict]] = {}
+    seen_ids: Set[str] = set()
+    valid_data: Dict[str, dict] = {}
+
+    for index, operation in enumerate(operations):
+        reason = _invalid_operation_reason(operation, seen_ids, valid_data)
+        if reason:
+            outcomes[index] = (BatchUpdateStatus.invalid, reason)
+        else:
+            pending[index] = (
+                ObjectId(operation.id),
+                valid_data[operation.id],
+            )
+
+    present_users = await users_repo.get_users_by_ids(
+        [user_id for user_id, _ in pending.values()],
+        with_password=False,
+    ) if pending else {}
+
+    renames: Dict[int, Tuple[str, str]] = {}
+    for index, (user_id, data) in list(pending.items()):
+        user = present_users.get(user_id)
+        if user is None:
+            outcomes[index] = (
+                BatchUpdateStatus.not_found,
+                error_messages.USER_DOES_NOT_EXIST,
+            )
+            del pending[index]
+            continue
+
+        name = (
+            data.get('first_name', user.first_name),
+            data.get('last_name', user.last_name),
+        )
+        if name != (user.first_name, user.last_name):
+            renames[index] = name
+
+    # a name is lost when someone else holds it or the batch claims it twice
+    owners = await users_repo.get_name_owners(set(renames.values()))
+    claims = Counter(renames.values())
+    for index, name in renames.items():
+        user_id = pending[index][0]
+        if claims[name] > 1 or owners.get(name, user_id) != user_id:
+            outcomes[index] = (
+                BatchUpdateStatus.conflict,
+                error_messages.USER_EXIST,
+            )
+            del pending[index]
+
+    writes = list(pending.items())
+    write_errors = await users_repo.update_users(
+        [update for _, update in writes],
+    ) if writes else {}
+
+    # the unique name index is the only thing that can reject a $set here,
+    # e.g. when a name was taken between the owner check and the write
+    for position, (index, (user_id, _)) in enumerate(writes):
+        forget_principal(present_users[user_id])
+        reason = write_errors.get(position)
+        if reason is None:
+            outcomes[index] = (BatchUpdateStatus.updated, None)
+        else:
+            outcomes[index] = (BatchUpdateStatus.conflict, reason)
+
+    return UsersBatchUpdateResult.construct(
+        results=[
+            UserBatchUpdateResult.construct(
+                id=operation.id,
+                status=outcomes[index][0],
+                detail=outcomes[index][1],
+            )
+            for index, operation in enumerate(operations)
+        ],
+    )
+
+
+async def list_users_page(
+        users_repo: UsersRepository,
+        *,
+        limit: int,
+        cursor: Optional[str] = None,
+        role: Optional[str] = None,
+        is_active: Optional[bool] = None,
+) -> UsersPage:
+    # one extra document tells whether another page exists
+    users = await users_repo.list_users(
+        limit=limit + 1,
+        after=decode_cursor(cursor) if cursor else None,
+        role=role,
+        is_active=is_active,
+    )
+    page = users[:limit]
+
+    return UsersPage.construct(
+        users=[UserProfile.from_user(user) for user in page],
+        next_cursor=encode_cursor(page[-1].id) if len(users) > limit else None,
+    )
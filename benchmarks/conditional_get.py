@@ -0,0 +1,67 @@
+"""Cost of answering ``GET /api/user`` with a 304 instead of a profile.
+
+Both paths resolve the token from the issued token cache and derive the
+ETag; the full path then builds and serializes the profile. Run with
+``python -m benchmarks.conditional_get``.
+"""
+from datetime import datetime
+
+from bson import ObjectId
+from starlette.responses import Response
+from starlette.status import HTTP_304_NOT_MODIFIED
+
+from app.api.responses import etag_matches
+from app.api.routes.users import _profile_etag, _profile_response
+from app.core import config
+from app.models.users import User
+from app.services import jwt
+from benchmarks.utils import measure, report, report_saving
+
+USER = User(
+    id=ObjectId(),
+    first_name="Bench",
+    last_name="User",
+    role="dev",
+    is_active=True,
+    created_at=datetime.now(),
+    last_login=datetime.now(),
+)
+SECRET_KEY = str(config.SECRET_KEY)
+
+
+def full_response() -> Response:
+    token = jwt.get_access_token_for_user(USER, SECRET_KEY)
+    return _profile_response(USER, token)
+
+
+def conditional_response(if_none_match: str) -> Response:
+    token = jwt.get_access_token_for_user(USER, SECRET_KEY)
+    etag = _profile_etag(USER, token)
+
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag},
+        )
+
+    return _profile_response(USER, token)
+
+
+def main() -> None:
+    etag = full_response().headers["ETag"]
+    assert (  # noqa: S101
+        conditional_response(etag).status_code == HTTP_304_NOT_MODIFIED
+    )
+
+    timings = (
+        measure(full_response),
+        measure(lambda: conditional_response(etag)),
+    )
+
+    report("200 with profile body", timings[0])
+    report("304 not modified", timings[1])
+    report_saving("If-None-Match", timings)
+
+
+if __name__ == "__main__":
+    main()
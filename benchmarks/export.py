@@ -0,0 +1,98 @@
+"""Throughput and peak memory of the streaming users export.
+
+Seeds ``--users`` synthetic documents into a scratch collection, streams
+them through ``export_users`` into a byte counter and reports docs/s and
+peak RSS. Needs the configured Mongo server. Run with
+``python -m benchmarks.export --users 100000 --format csv``.
+"""
+import argparse
+import asyncio
+import resource
+import time
+from datetime import datetime
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import EXPORT_BATCH_SIZE, MONGO_DATABASE, MONGO_URI
+from app.db.repositories.users import UsersRepository
+from app.services.export import ExportFormat, export_users
+
+SEED_BATCH_SIZE = 10000
+
+
+class ScratchUsersRepository(UsersRepository):
+    collection_name = "benchmark_export_users"
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def seed(users_repo: UsersRepository, count: int) -> None:
+    now = datetime.now()
+
+    for start in range(0, count, SEED_BATCH_SIZE):
+        await users_repo.collection.insert_many([
+            {
+                '_id': ObjectId(),
+                'first_name': 'First{0}'.format(number),
+                'last_name': 'Last{0}'.format(number),
+                'role': 'dev',
+                'is_active': number % 2 == 0,
+                'created_at': now,
+                'last_login': now,
+                'hashed_pass': '$2b$12$' + 'x' * 53,
+            }
+            for number in range(start, min(start + SEED_BATCH_SIZE, count))
+        ])
+
+
+async def run(count: int, export_format: ExportFormat, batch_size: int) -> None:
+    client = AsyncIOMotorClient(MONGO_URI)
+    users_repo = ScratchUsersRepository(client[MONGO_DATABASE])
+
+    try:
+        await users_repo.collection.drop()
+        await seed(users_repo, count)
+        rss_before = _peak_rss_mb()
+
+        exported_bytes = 0
+        started = time.perf_counter()
+        async for chunk in export_users(users_repo, export_format, batch_size):
+            exported_bytes += len(chunk)
+        elapsed = time.perf_counter() - started
+    finally:
+        await users_repo.collection.drop()
+        client.close()
+
+    print("exported {0} users as {1} ({2:.1f} MB) in {3:.2f}s".format(
+        count,
+        export_format.value,
+        exported_bytes / 1024 / 1024,
+        elapsed,
+    ))
+    print("throughput: {0:.0f} docs/s".format(count / elapsed))
+    print("peak RSS: {0:.1f} MB (after seeding {1:.1f} MB)".format(
+        _peak_rss_mb(),
+        rss_before,
+    ))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument(
+        "--format",
+        choices=[export_format.value for export_format in ExportFormat],
+        default=ExportFormat.ndjson.value,
+    )
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.users, ExportFormat(args.format), args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
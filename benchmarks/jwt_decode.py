@@ -0,0 +1,56 @@
+"""CPU cost of resolving a token with and without the decode caches.
+
+Run with ``python -m benchmarks.jwt_decode``.
+"""
+from bson import ObjectId
+
+from app.core import config
+from app.models.users import User
+from app.services import jwt
+from benchmarks.utils import measure, report, report_saving
+
+
+def main() -> None:
+    secret_key = str(config.SECRET_KEY)
+    user = User(
+        id=ObjectId(),
+        first_name="Bench",
+        last_name="User",
+        role="dev",
+    )
+    token = jwt.create_access_token_for_user(user, secret_key)
+    garbage = "{0}broken".format(token)
+
+    def decode_uncached() -> None:
+        jwt.verified_tokens.clear()
+        jwt.get_jwt_user_from_token(token, secret_key)
+
+    def decode_cached() -> None:
+        jwt.get_jwt_user_from_token(token, secret_key)
+
+    def reject(bad_token: str) -> None:
+        try:
+            jwt.get_jwt_user_from_token(bad_token, secret_key)
+        except ValueError:
+            return
+
+    def reject_uncached() -> None:
+        jwt.rejected_tokens.clear()
+        reject(garbage)
+
+    def reject_cached() -> None:
+        reject(garbage)
+
+    decoded = (measure(decode_uncached), measure(decode_cached))
+    rejected = (measure(reject_uncached), measure(reject_cached))
+
+    report("valid token, cold cache", decoded[0])
+    report("valid token, warm cache", decoded[1])
+    report_saving("valid token", decoded)
+    report("rejected token, cold cache", rejected[0])
+    report("rejected token, warm cache", rejected[1])
+    report_saving("rejected token", rejected)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""Throughput and latency percentiles of the API under a mixed load.
+
+Drives the real application from ``get_application()`` in process with
+``--concurrency`` clients. Each request picks a scenario by the weights
+given in ``--mix``: ``register``, ``login``, ``me`` (``GET /api/user``)
+and ``admin_update``. Throughput and p50/p95/p99 latencies are reported
+per route. ``--save-baseline`` writes them to a JSON file and
+``--baseline`` compares the run against one, exiting with status 1 when
+a route got slower or served fewer requests per second than
+``--tolerance`` allows. Needs the configured Mongo server, whose users
+created by the run are removed at the end, unless ``STORAGE_BACKEND``
+is ``memory``; that leaves out the database to isolate the framework.
+Run with ``python -m benchmarks.load --requests 2000``.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+from asgi_lifespan import LifespanManager
+from httpx import AsyncClient, Response
+
+from app.core.config import JWT_TOKEN_PREFIX
+from app.db.memory import InMemoryDatabase
+from app.db.repositories.users import UsersRepository
+from app.main import get_application
+
+SCENARIOS = ("register", "login", "me", "admin_update")
+DEFAULT_MIX = "register=1,login=2,me=10,admin_update=1"
+PERCENTILES = (50, 95, 99)
+PASSWORD = "benchmark"
+
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError("unknown scenario {0}".format(name))
+        weights[name] = int(weight or 1)
+
+    if not any(weights.values()):
+        raise ValueError("the mix has no scenario with a positive weight")
+
+    return weights
+
+
+def percentile(latencies: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted ``latencies``."""
+    index = max(math.ceil(fraction * len(latencies)) - 1, 0)
+
+    return latencies[min(index, len(latencies) - 1)]
+
+
+def summarize(
+        latencies: Dict[str, List[float]],
+        errors: Dict[str, int],
+        elapsed: float,
+) -> Dict[str, Dict[str, float]]:
+    routes = {}
+
+    for route, samples in sorted(latencies.items()):
+        samples.sort()
+        summary = {
+            "requests": len(samples),
+            "errors": errors.get(route, 0),
+            "rps": len(samples) / elapsed,
+        }
+        for rank in PERCENTILES:
+            summary["p{0}_ms".format(rank)] = (
+                percentile(samples, rank / 100) * 1000
+            )
+        routes[route] = summary
+
+    return routes
+
+
+def compare(
+        routes: Dict[str, Dict[str, float]],
+        baseline: Dict[str, Dict[str, float]],
+        tolerance: float,
+) -> List[str]:
+    """Return a line for every metric that regressed past ``tolerance``."""
+    regressions = []
+
+    for route, summary in routes.items():
+        before = baseline.get(route)
+        if before is None:
+            continue
+
+        if summary["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append("{0}: {1:.0f} rps, baseline {2:.0f}".format(
+                route,
+                summary["rps"],
+                before["rps"],
+            ))
+
+        for rank in PERCENTILES:
+            key = "p{0}_ms".format(rank)
+            if summary[key] > before[key] * (1 + tolerance):
+                regressions.append(
+                    "{0}: {1} {2:.2f} ms, baseline {3:.2f} ms".format(
+                        route,
+                        key[:-3],
+                        summary[key],
+                        before[key],
+                    ),
+                )
+
+    return regressions
+
+
+class LoadRun:
+    """Scenarios and the per route samples of one benchmark run."""
+
+    def __init__(self, client: AsyncClient, prefix: str, seed: int) -> None:
+        self.client = client
+        self.prefix = prefix
+        self.random = random.Random(seed)
+
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+        self.users: List[Tuple[str, str]] = []
+        self.targets: List[str] = []
+        self.tokens: List[str] = []
+        self.admin_token = ""
+        self._registered = 0
+
+    def _next_name(self) -> str:
+        self._registered += 1
+        return "{0}{1}".format(self.prefix, self._registered)
+
+    @staticmethod
+    def _auth(token: str) -> Dict[str, str]:
+        return {"Authorization": "{0} {1}".format(JWT_TOKEN_PREFIX, token)}
+
+    async def _send(
+            self,
+            route: str,
+            method: str,
+            url: str,
+            **kwargs: Any,
+    ) -> Response:
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.latencies[route].append(time.perf_counter() - started)
+
+        if response.status_code >= 400:
+            self.errors[route] += 1
+
+        return response
+
+    async def _register(self, role: str) -> Tuple[str, str, str]:
+        first_name = self._next_name()
+        response = await self._send(
+            "auth:register",
+            "POST",
+            "/api/users",
+            json={"user": {
+                "first_name": first_name,
+                "last_name": "Load",
+                "password": PASSWORD,
+                "role": role,
+            }},
+        )
+        response.raise_for_status()
+        body = response.json()
+
+        return first_name, body["id"], body["token"]
+
+    async def prepare(self, users: int) -> None:
+        _, _, self.admin_token = await self._register("admin")
+
+        for _ in range(users):
+            first_name, _, token = await self._register("dev")
+            self.users.append((first_name, "Load"))
+            self.tokens.append(token)
+            _, target_id, _ = await self._register("dev")
+            self.targets.append(target_id)
+
+        self.latencies.clear()
+        self.errors.clear()
+
+    async def register(self) -> None:
+        await self._register("simple_mortal")
+
+    async def login(self) -> None:
+        first_name, last_name = self.random.choice(self.users)
+        await self._send(
+            "auth:login",
+            "POST",
+            "/api/users/login",
+            json={"user": {
+                "first_name": first_name,
+                "last_name": last_name,
+                "password": PASSWORD,
+            }},
+        )
+
+    async def me(self) -> None:
+        await self._send(
+            "users:get-current-user",
+            "GET",
+            "/api/user",
+            headers=self._auth(self.random.choice(self.tokens)),
+        )
+
+    async def admin_update(self) -> None:
+        await self._send(
+            "users:admin-update-user",
+            "POST",
+            "/api/user/admin/{0}".format(self.random.choice(self.targets)),
+            json={"user": {
+                "role": self.random.choice(("dev", "simple_mortal")),
+            }},
+            headers=self._auth(self.admin_token),
+        )
+
+    async def drive(
+            self,
+            weights: Dict[str, int],
+            requests: int,
+            concurrency: int,
+    ) -> float:
+        """Send ``requests`` requests and return the wall time."""
+        scenarios = [getattr(self, name) for name in weights]
+        remaining = requests
+
+        async def worker() -> None:  # noqa: WPS430
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                scenario = self.random.choices(
+                    scenarios,
+                    weights=list(weights.values()),
+                )[0]
+                await scenario()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+        return time.perf_counter() - started
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    prefix = "Load{0}".format(uuid.uuid4().hex[:8])
+    app = get_application()
+
+    async with LifespanManager(app):
+        async with AsyncClient(
+            app=app,
+            base_url="http://benchmark",
+        ) as client:
+            load = LoadRun(client, prefix, args.seed)
+            try:
+                await load.prepare(args.users)
+                elapsed = await load.drive(
+                    parse_mix(args.mix),
+                    args.requests,
+                    args.concurrency,
+                )
+            finally:
+                # the in-memory backend is dropped with the application
+                if not isinstance(app.state.db, InMemoryDatabase):
+                    await UsersRepository(
+                        app.state.db,
+                    ).collection.delete_many(
+                        {"first_name": {"$regex": "^{0}".format(prefix)}},
+                    )
+
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "mix": args.mix,
+        "elapsed": elapsed,
+        "rps": args.requests / elapsed,
+        "routes": summarize(load.latencies, load.errors, elapsed),
+    }
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    print("{0:<32} {1:>8} {2:>7} {3:>9} {4:>9} {5:>9} {6:>9}".format(
+        "route", "requests", "errors", "rps", "p50 ms", "p95 ms", "p99 ms",
+    ))
+    for route, summary in results["routes"].items():
+        print(
+            "{0:<32} {1:>8} {2:>7} {3:>9.1f} {4:>9.2f} {5:>9.2f} "
+            "{6:>9.2f}".format(
+                route,
+                summary["requests"],
+                summary["errors"],
+                summary["rps"],
+                summary["p50_ms"],
+                summary["p95_ms"],
+                summary["p99_ms"],
+            ),
+        )
+    print("{0:<32} {1:>8} {2:>7} {3:>9.1f}".format(
+        "total", results["requests"], "", results["rps"],
+    ))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument(
+        "--users",
+        type=int,
+        default=20,
+        help="users registered up front for login, me and admin_update",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save-baseline", metavar="PATH")
+    parser.add_argument("--baseline", metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(
+            results["routes"],
+            baseline["routes"],
+            args.tolerance,
+        )
+        for regression in regressions:
+            print("REGRESSION {0}".format(regression))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Cost and allocations of the hot functions against stored thresholds.
+
+Each case is timed with ``benchmarks.utils.measure`` and traced with
+``tracemalloc`` for the peak memory allocated by a single call.
+Both are compared with the limits in ``--thresholds`` and the run
+exits with status 1 when a case is slower or allocates more than its
+limit. ``--update`` rewrites the limits from the current run multiplied
+by ``--headroom``; time limits depend on the machine, so regenerate
+them where the suite runs. Does not need Mongo.
+Run with ``python -m benchmarks.micro``.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple
+
+from bson import ObjectId
+
+from app.core import config
+from app.models.rwmodel import OID
+from app.models.schemas.users import UserProfile
+from app.models.users import User
+from app.services import jwt, security
+from benchmarks.utils import measure, report
+
+DEFAULT_THRESHOLDS = os.path.join(
+    os.path.dirname(__file__),
+    "micro_thresholds.json",
+)
+PASSWORD = "benchmark"
+
+
+class Case(NamedTuple):
+    name: str
+    func: Callable[[], object]
+    number: int
+
+
+def build_cases() -> List[Case]:
+    secret_key = str(config.SECRET_KEY)
+    now = datetime.now()
+    document = {
+        "_id": ObjectId(),
+        "first_name": "Bench",
+        "last_name": "User",
+        "role": "dev",
+        "is_active": True,
+        "created_at": now,
+        "last_login": now,
+        "hashed_pass": security.get_password_hash(PASSWORD),
+        "version": 3,
+    }
+    user = User(**document)
+    token = jwt.create_access_token_for_user(user, secret_key)
+    object_id = str(document["_id"])
+    rounds = document["hashed_pass"].split("$")[2]
+
+    def decode_cold() -> object:
+        jwt.verified_tokens.clear()
+        return jwt.get_jwt_user_from_token(token, secret_key)
+
+    return [
+        Case(
+            "create_access_token_for_user",
+            lambda: jwt.create_access_token_for_user(user, secret_key),
+            2000,
+        ),
+        Case("get_jwt_user_from_token, cold cache", decode_cold, 2000),
+        Case(
+            "get_jwt_user_from_token, warm cache",
+            lambda: jwt.get_jwt_user_from_token(token, secret_key),
+            20000,
+        ),
+        Case("User(**doc)", lambda: User(**document), 10000),
+        Case(
+            "UserProfile(**user.dict(exclude=...))",
+            lambda: UserProfile(**user.dict(exclude={"hashed_pass"})),
+            10000,
+        ),
+        Case("MongoModel.mongo()", user.mongo, 10000),
+        Case("OID.validate", lambda: OID.validate(object_id), 50000),
+        Case(
+            "verify_password, cost {0}".format(rounds),
+            lambda: security.verify_password(
+                PASSWORD,
+                document["hashed_pass"],
+            ),
+            3,
+        ),
+    ]
+
+
+def allocated_per_call(func: Callable[[], object]) -> int:
+    """Return the peak bytes traced while running ``func()`` once."""
+    func()
+    peaks = []
+
+    for _ in range(3):
+        # restarting is the only way to reset the peak before Python 3.9
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peaks.append(peak)
+
+    return min(peaks)
+
+
+def run(cases: List[Case], repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+
+    for case in cases:
+        seconds = measure(case.func, number=case.number, repeat=repeat)
+        allocated = allocated_per_call(case.func)
+        report(case.name, seconds)
+        print("{0:<48} {1:>10} B/op".format("", allocated))
+        results[case.name] = {
+            "us_per_op": seconds * 1e6,
+            "bytes_per_op": allocated,
+        }
+
+    return results
+
+
+def check(
+        results: Dict[str, Dict[str, float]],
+        thresholds: Dict[str, Dict[str, float]],
+) -> List[str]:
+    """Return a line for every measurement above its threshold."""
+    failures = []
+
+    for name, measured in results.items():
+        limits = thresholds.get(name)
+        if limits is None:
+            failures.append("{0}: no threshold stored".format(name))
+            continue
+
+        for metric, limit in sorted(limits.items()):
+            if measured[metric] > limit:
+                failures.append("{0}: {1} {2:.2f} > {3:.2f}".format(
+                    name,
+                    metric,
+                    measured[metric],
+                    limit,
+                ))
+
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--update", action="store_true")
+    parser.add_argument("--headroom", type=float, default=1.5)
+    args = parser.parse_args()
+
+    results = run(build_cases(), args.repeat)
+
+    if args.update:
+        thresholds = {
+            name: {
+                "us_per_op": round(measured["us_per_op"] * args.headroom, 2),
+                "bytes_per_op": math.ceil(
+                    measured["bytes_per_op"] * args.headroom,
+                ),
+            }
+            for name, measured in results.items()
+        }
+        with open(args.thresholds, "w") as thresholds_file:
+            json.dump(thresholds, thresholds_file, indent=2, sort_keys=True)
+            thresholds_file.write("\n")
+        return
+
+    with open(args.thresholds) as thresholds_file:
+        failures = check(results, json.load(thresholds_file))
+
+    for failure in failures:
+        print("REGRESSION {0}".format(failure))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Cost of encoding a profile response through FastAPI and directly.
+
+The FastAPI path re-validates the value against ``response_model`` and
+runs ``jsonable_encoder`` before ``JSONResponse``; ``MongoJSONResponse``
+serializes the already built model. Run with
+``python -m benchmarks.responses``.
+"""
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.utils import create_response_field
+from starlette.responses import JSONResponse
+
+from app.api import responses
+from app.api.responses import MongoJSONResponse
+from app.models.schemas.users import UserProfile
+from benchmarks.utils import measure, report, report_saving
+
+PROFILE = UserProfile(
+    id=ObjectId(),
+    first_name="Bench",
+    last_name="User",
+    role="dev",
+    is_active=True,
+    created_at=datetime.now(),
+    last_login=datetime.now(),
+    token="x" * 180,
+)
+
+RESPONSE_FIELD = create_response_field(name="profile", type_=UserProfile)
+
+
+def fastapi_path() -> bytes:
+    value, _ = RESPONSE_FIELD.validate(  # noqa: WPS110
+        PROFILE,
+        {},
+        loc=("response",),
+    )
+    return JSONResponse(jsonable_encoder(value)).body
+
+
+def fast_path() -> bytes:
+    return MongoJSONResponse(PROFILE).body
+
+
+def main() -> None:
+    assert fastapi_path() == fast_path()  # noqa: S101
+
+    default = measure(fastapi_path)
+    report("response_model + jsonable_encoder", default)
+
+    if responses.orjson is not None:
+        with_orjson = measure(fast_path)
+        report("MongoJSONResponse (orjson)", with_orjson)
+        report_saving("orjson", (default, with_orjson))
+
+    orjson, responses.orjson = responses.orjson, None
+    try:
+        with_json = measure(fast_path)
+    finally:
+        responses.orjson = orjson
+
+    report("MongoJSONResponse (json)", with_json)
+    report_saving("json", (default, with_json))
+
+
+if __name__ == "__main__":
+    main()
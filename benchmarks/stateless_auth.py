@@ -0,0 +1,134 @@
+"""Requests per second of an authenticated route with stateful and
+stateless authentication.
+
+Serves a minimal route behind each authorizer in process and drives it
+with ``--concurrency`` clients. The stateful route is measured with a
+cold principal cache (a user lookup per request) and a warm one. Needs
+the configured Mongo server; a scratch user is created and removed.
+Run with ``python -m benchmarks.stateless_auth --requests 5000``.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Callable, Optional
+
+from fastapi import Depends, FastAPI
+from httpx import AsyncClient
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.api.dependencies.auth import get_current_user_authorizer
+from app.core.config import (JWT_TOKEN_PREFIX, MONGO_DATABASE, MONGO_URI,
+                             SECRET_KEY)
+from app.db.repositories.users import UsersRepository, principal_cache
+from app.models.schemas.users import UserCreate
+from app.models.users import User
+from app.services import jwt
+from benchmarks.utils import report, report_saving
+
+
+def build_app(database) -> FastAPI:
+    app = FastAPI()
+    app.state.db = database
+
+    @app.get("/stateful")
+    async def stateful(  # noqa: WPS430
+        user: User = Depends(get_current_user_authorizer()),
+    ) -> dict:
+        return {"role": user.role}
+
+    @app.get("/stateless")
+    async def stateless(  # noqa: WPS430
+        user: User = Depends(get_current_user_authorizer(stateless=True)),
+    ) -> dict:
+        return {"role": user.role}
+
+    return app
+
+
+async def measure_requests(
+        client: AsyncClient,
+        url: str,
+        requests: int,
+        concurrency: int,
+        before_request: Optional[Callable[[], None]] = None,
+) -> float:
+    """Return the wall time per request in seconds."""
+    async def worker(count: int) -> None:  # noqa: WPS430
+        for _ in range(count):
+            if before_request is not None:
+                before_request()
+            response = await client.get(url)
+            response.raise_for_status()
+
+    per_worker = requests // concurrency
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(per_worker) for _ in range(concurrency)))
+
+    return (time.perf_counter() - started) / (per_worker * concurrency)
+
+
+async def run(requests: int, concurrency: int) -> None:
+    client = AsyncIOMotorClient(MONGO_URI)
+    users_repo = UsersRepository(client[MONGO_DATABASE])
+    user = await users_repo.create_user(
+        UserCreate(
+            first_name="Bench{0}".format(uuid.uuid4().hex[:8]),
+            last_name="Stateless",
+            password="benchmark",
+            role="dev",
+        ),
+    )
+    # trust tokens for the whole run
+    jwt.STATELESS_AUTH_MAX_AGE_SECONDS = 3600
+    token = jwt.create_access_token_for_user(user, str(SECRET_KEY))
+
+    try:
+        async with AsyncClient(
+            app=build_app(users_repo.connection),
+            base_url="http://benchmark",
+            headers={
+                "Authorization": "{0} {1}".format(JWT_TOKEN_PREFIX, token),
+            },
+        ) as http:
+            cold = await measure_requests(
+                http,
+                "/stateful",
+                requests,
+                concurrency,
+                before_request=principal_cache.clear,
+            )
+            warm = await measure_requests(
+                http,
+                "/stateful",
+                requests,
+                concurrency,
+            )
+            stateless = await measure_requests(
+                http,
+                "/stateless",
+                requests,
+                concurrency,
+            )
+    finally:
+        await users_repo.collection.delete_one({"_id": user.id})
+        client.close()
+
+    report("stateful, principal cache cold", cold)
+    report("stateful, principal cache warm", warm)
+    report("stateless", stateless)
+    report_saving("stateless vs cold cache", (cold, stateless))
+    report_saving("stateless vs warm cache", (warm, stateless))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
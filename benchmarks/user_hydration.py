@@ -0,0 +1,46 @@
+"""CPU cost of turning a stored user document into a profile response.
+
+Compares validated construction (``User(**doc)`` followed by
+``UserProfile(**user.dict(exclude=...))``) with the trusted path used for
+repository reads. Run with ``python -m benchmarks.user_hydration``.
+"""
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.models.schemas.users import UserProfile
+from app.models.users import User
+from benchmarks.utils import measure, report, report_saving
+
+DOCUMENT = {
+    '_id': ObjectId(),
+    'first_name': 'Bench',
+    'last_name': 'User',
+    'role': 'dev',
+    'is_active': True,
+    'created_at': datetime.now(),
+    'last_login': datetime.now(),
+    'hashed_pass': '$2b$12$' + 'x' * 53,
+}
+
+
+def validated() -> UserProfile:
+    user = User(**DOCUMENT)
+    return UserProfile(**user.dict(exclude={'hashed_pass'}), token='token')
+
+
+def trusted() -> UserProfile:
+    user = User.from_mongo_trusted(DOCUMENT)
+    return UserProfile.from_user(user, token='token')
+
+
+def main() -> None:
+    timings = (measure(validated), measure(trusted))
+
+    report("validated User + UserProfile", timings[0])
+    report("trusted User + UserProfile", timings[1])
+    report_saving("per GET /api/user", timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import time
+from typing import Callable, Tuple
+
+
+def measure(
+        func: Callable[[], object],
+        *,
+        number: int = 10000,
+        repeat: int = 5,
+) -> float:
+    """Return the best observed cost of one ``func()`` call in seconds."""
+    best = float("inf")
+
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - started) / number)
+
+    return best
+
+
+def report(name: str, seconds: float) -> None:
+    print("{0:<48} {1:>10.2f} us/op {2:>12.0f} ops/s".format(
+        name,
+        seconds * 1e6,
+        1 / seconds,
+    ))
+
+
+def report_saving(name: str, timings: Tuple[float, float]) -> None:
+    before, after = timings
+    print("{0:<48} {1:>10.2f} us saved ({2:.1f}x)".format(
+        name,
+        (before - after) * 1e6,
+        before / after,
+    ))
@@ -19,6 +19,8 @@ from tests.utils import pull_image
 MONGO_DOCKER_IMAGE = "mongo:4.2.2"
 
 USE_LOCAL_DB = getenv("USE_LOCAL_DB_FOR_TEST", False)
+# STORAGE_BACKEND=memory runs the suite without Mongo, see app/db/memory.py
+USE_MEMORY_DB = config.STORAGE_BACKEND == "memory"
 
 
 @pytest.fixture(scope="session")
@@ -28,10 +30,13 @@ def docker() -> libdocker.APIClient:
 
 
 @pytest.fixture(scope="session", autouse=True)
-def mongo_db(docker: libdocker.APIClient) -> None:
+def mongo_db(request: pytest.FixtureRequest) -> None:
     warnings.filterwarnings("ignore", category=DeprecationWarning)
 
-    if not USE_LOCAL_DB:  # pragma: no cover
+    if USE_MEMORY_DB:
+        yield
+    elif not USE_LOCAL_DB:  # pragma: no cover
+        docker = request.getfixturevalue("docker")
         pull_image(docker, MONGO_DOCKER_IMAGE)
 
         container = docker.create_container(
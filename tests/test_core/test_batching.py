@@ -0,0 +1,70 @@
+import asyncio
+from typing import Dict, List
+
+import pytest
+
+from app.core.batching import BatchLoader
+
+pytestmark = pytest.mark.asyncio
+
+
+class RecordingLoad:
+    def __init__(self) -> None:
+        self.batches: List[List[int]] = []
+
+    async def __call__(self, keys: List[int]) -> Dict[int, str]:
+        self.batches.append(keys)
+        return {key: "user {0}".format(key) for key in keys if key > 0}
+
+
+async def test_lookups_of_one_tick_are_loaded_together():
+    load_many = RecordingLoad()
+    loader = BatchLoader(load_many, max_batch_size=10, window=0)
+
+    results = await asyncio.gather(
+        loader.load(1),
+        loader.load(2),
+        loader.load(1),
+        loader.load(-1),
+    )
+
+    assert results == ["user 1", "user 2", "user 1", None]
+    assert load_many.batches == [[1, 2, -1]]
+    assert loader.stats() == {"pending": 0, "loads": 4, "batches": 1}
+
+
+async def test_full_batch_is_loaded_without_waiting_for_window():
+    load_many = RecordingLoad()
+    loader = BatchLoader(load_many, max_batch_size=2, window=60)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(loader.load(1), loader.load(2)),
+        timeout=1,
+    )
+
+    assert results == ["user 1", "user 2"]
+    assert load_many.batches == [[1, 2]]
+
+
+async def test_batch_size_limits_keys_per_load():
+    load_many = RecordingLoad()
+    loader = BatchLoader(load_many, max_batch_size=2, window=0)
+
+    await asyncio.gather(*(loader.load(key) for key in range(1, 6)))
+
+    assert load_many.batches == [[1, 2], [3, 4], [5]]
+
+
+async def test_load_error_is_raised_to_every_caller():
+    async def failing_load(keys: List[int]) -> Dict[int, str]:
+        raise ConnectionError("database is gone")
+
+    loader = BatchLoader(failing_load, max_batch_size=10, window=0)
+
+    results = await asyncio.gather(
+        loader.load(1),
+        loader.load(2),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(error, ConnectionError) for error in results)
@@ -0,0 +1,23 @@
+from app.core.bloom import BloomFilter
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = ["user:{0}".format(number) for number in range(1000)]
+
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+
+
+def test_bloom_filter_keeps_false_positives_near_error_rate():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for number in range(1000):
+        bloom.add("user:{0}".format(number))
+
+    false_positives = sum(
+        "other:{0}".format(number) in bloom for number in range(10000)
+    )
+
+    assert false_positives < 300
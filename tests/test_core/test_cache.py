@@ -0,0 +1,44 @@
+import time
+
+from app.core.cache import TTLCache
+
+
+def test_cache_returns_stored_value_and_counts_hits():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("key", "value")
+
+    assert cache.get("key") == "value"
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_evicts_least_recently_used_entry():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("first", 1)
+    cache.set("second", 2)
+    cache.get("first")
+    cache.set("third", 3)
+
+    assert cache.get("second") is None
+    assert cache.get("first") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_entry_expires(monkeypatch):
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("key", "value", ttl=5)
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 10)
+
+    assert cache.get("key") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_disabled_cache_stores_nothing():
+    cache = TTLCache(maxsize=0, ttl=60)
+    cache.set("key", "value")
+
+    assert cache.get("key") is None
+    assert len(cache) == 0
@@ -0,0 +1,39 @@
+from app.core.metrics import Histogram, render_stats
+
+
+def test_histogram_counts_observations_cumulatively():
+    histogram = Histogram("duration_seconds", "Test.", buckets=(0.1, 1))
+
+    for observed in (0.05, 0.1, 0.5, 5):
+        histogram.observe(observed)
+
+    series = histogram.collect()[()]
+
+    assert list(series["buckets"].values()) == [2, 3, 4]
+    assert series["count"] == 4
+    assert series["sum"] == 5.65
+
+
+def test_histogram_renders_prometheus_text():
+    histogram = Histogram(
+        "duration_seconds",
+        "Test.",
+        labelnames=("route",),
+        buckets=(0.1,),
+    )
+    histogram.observe(0.05, 'say "hi"')
+
+    assert list(histogram.render()) == [
+        "# HELP duration_seconds Test.",
+        "# TYPE duration_seconds histogram",
+        'duration_seconds_bucket{route="say \\"hi\\"",le="0.1"} 1',
+        'duration_seconds_bucket{route="say \\"hi\\"",le="+Inf"} 1',
+        'duration_seconds_sum{route="say \\"hi\\""} 0.05',
+        'duration_seconds_count{route="say \\"hi\\""} 1',
+    ]
+
+
+def test_only_numeric_stats_are_rendered():
+    lines = list(render_stats("pool", {"size": 3, "kind": "thread"}))
+
+    assert lines == ["# TYPE pool_size gauge", "pool_size 3"]
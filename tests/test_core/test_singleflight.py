@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+from app.db.errors import EntityDoesNotExist
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_concurrent_calls_for_one_key_share_a_single_call():
+    single_flight = SingleFlight()
+    started = 0
+
+    async def lookup() -> str:
+        nonlocal started
+        started += 1
+        await asyncio.sleep(0.01)
+        return "user"
+
+    results = await asyncio.gather(*(
+        single_flight.do("key", lookup) for _ in range(5)
+    ))
+
+    assert results == ["user"] * 5
+    assert started == 1
+    assert single_flight.stats() == {
+        "in_flight": 0,
+        "calls": 1,
+        "coalesced": 4,
+    }
+
+
+async def test_different_keys_are_not_coalesced():
+    single_flight = SingleFlight()
+
+    async def lookup() -> None:
+        await asyncio.sleep(0)
+
+    await asyncio.gather(
+        single_flight.do("first", lookup),
+        single_flight.do("second", lookup),
+    )
+
+    assert single_flight.stats()["calls"] == 2
+
+
+async def test_error_propagates_to_every_waiter():
+    single_flight = SingleFlight()
+
+    async def lookup() -> None:
+        await asyncio.sleep(0.01)
+        raise EntityDoesNotExist("user does not exist")
+
+    results = await asyncio.gather(
+        *(single_flight.do("key", lookup) for _ in range(3)),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(error, EntityDoesNotExist) for error in results)
+    assert single_flight.stats()["in_flight"] == 0
+
+
+async def test_finished_call_is_not_reused():
+    single_flight = SingleFlight()
+    started = 0
+
+    async def lookup() -> int:
+        nonlocal started
+        started += 1
+        return started
+
+    assert await single_flight.do("key", lookup) == 1
+    assert await single_flight.do("key", lookup) == 2
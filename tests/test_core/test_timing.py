@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from app.core import timing
+
+pytestmark = pytest.mark.asyncio
+
+
+@timing.timed("work")
+async def outer() -> str:
+    await asyncio.sleep(0.01)
+    return await inner()
+
+
+@timing.timed("work")
+async def inner() -> str:
+    await asyncio.sleep(0.01)
+    return "done"
+
+
+@timing.timed("encode")
+def encode() -> bytes:
+    return b"{}"
+
+
+async def test_phases_are_recorded_once_per_request():
+    timings = {}
+    token = timing._phase_timings.set(timings)  # noqa: WPS437
+    try:
+        assert await outer() == "done"
+        assert encode() == b"{}"
+    finally:
+        timing._phase_timings.reset(token)  # noqa: WPS437
+
+    assert set(timings) == {"work", "encode"}
+    assert 0.02 <= timings["work"] < 0.1
+
+
+async def test_timed_functions_run_outside_of_requests():
+    assert await outer() == "done"
+    assert encode() == b"{}"
@@ -0,0 +1,54 @@
+import pytest
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.db.indexes import (UniqueIndexMissing, check_unique_indexes,
+                            ensure_indexes, get_index_drift)
+from app.db.repositories.users import UsersRepository
+from tests.utils import requires_mongo
+
+pytestmark = [pytest.mark.asyncio, requires_mongo]
+
+
+async def test_startup_creates_declared_indexes(
+        connection: AsyncIOMotorDatabase,
+        cleanup
+):
+    drift = await get_index_drift(connection, UsersRepository)
+
+    assert not drift.has_drift
+
+
+async def test_missing_index_is_recreated(
+        connection: AsyncIOMotorDatabase,
+        cleanup
+):
+    collection = connection[UsersRepository.collection_name]
+    await collection.drop_index('first_name_last_name')
+
+    drift = await get_index_drift(connection, UsersRepository)
+    assert [index.document['name'] for index in drift.missing] == [
+        'first_name_last_name',
+    ]
+
+    await ensure_indexes(connection)
+
+    drift = await get_index_drift(connection, UsersRepository)
+    assert not drift.has_drift
+
+
+async def test_missing_unique_index_fails_the_check(
+        connection: AsyncIOMotorDatabase,
+        cleanup
+):
+    await check_unique_indexes(connection)
+
+    collection = connection[UsersRepository.collection_name]
+    await collection.drop_index('first_name_last_name')
+
+    with pytest.raises(UniqueIndexMissing):
+        await check_unique_indexes(connection)
+
+    # non-unique indexes are only reported as drift
+    await ensure_indexes(connection)
+    await collection.drop_index('role_id')
+    await check_unique_indexes(connection)
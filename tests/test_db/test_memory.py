@@ -0,0 +1,69 @@
+import pytest
+from bson import ObjectId
+
+from app.db.errors import EntityAlreadyExists
+from app.db.events import create_memory_database
+from app.db.memory import InMemoryCollection
+from app.db.repositories.memory import InMemoryUsersRepository
+from app.db.repositories.users import UsersRepository
+
+
+@pytest.fixture
+def collection() -> InMemoryCollection:
+    collection = InMemoryCollection("users")
+    collection.create_indexes(UsersRepository.indexes)
+
+    return collection
+
+
+def test_unique_index_rejects_duplicate_insert(collection):
+    collection.insert({'first_name': 'Ann', 'last_name': 'Lee'})
+
+    with pytest.raises(EntityAlreadyExists):
+        collection.insert({'first_name': 'Ann', 'last_name': 'Lee'})
+
+    assert len(collection) == 1
+
+
+def test_update_moves_the_unique_index_entry(collection):
+    user_id = collection.insert({'first_name': 'Ann', 'last_name': 'Lee'})
+    other_id = collection.insert({'first_name': 'Bob', 'last_name': 'Lee'})
+
+    with pytest.raises(EntityAlreadyExists):
+        collection.update(other_id, {'first_name': 'Ann'})
+
+    collection.update(user_id, {'first_name': 'Eve'})
+
+    assert not collection.find_unique('first_name_last_name', ('Ann', 'Lee'))
+    assert collection.find_unique('first_name_last_name', ('Eve', 'Lee'))
+    assert collection.update(other_id, {'first_name': 'Ann'}) is not None
+
+
+def test_documents_are_copied_in_and_out(collection):
+    document = {'first_name': 'Ann', 'last_name': 'Lee'}
+    user_id = collection.insert(document)
+
+    document['first_name'] = 'Eve'
+    collection.get(user_id)['first_name'] = 'Eve'
+
+    assert collection.get(user_id)['first_name'] == 'Ann'
+
+
+def test_scan_follows_id_order_after_the_given_id(collection):
+    ids = sorted(ObjectId() for _ in range(5))
+    for number, user_id in enumerate(reversed(ids)):
+        collection.insert({
+            '_id': user_id,
+            'first_name': 'User{0}'.format(number),
+            'last_name': 'Lee',
+        })
+
+    scanned = [document['_id'] for document in collection.scan(after=ids[1])]
+
+    assert scanned == ids[2:]
+
+
+def test_repositories_of_a_memory_database_use_its_implementation():
+    database = create_memory_database()
+
+    assert isinstance(UsersRepository(database), InMemoryUsersRepository)
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+import pytest
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import monitoring
+
+from app.core.config import MIN_CONNECTIONS_COUNT
+from app.db.monitoring import CommandStatsListener, _redact, pool_stats
+from tests.utils import requires_mongo
+
+pytestmark = pytest.mark.asyncio
+
+
+@requires_mongo
+async def test_pool_is_warmed_up_at_startup(
+        connection: AsyncIOMotorDatabase,
+):
+    stats = pool_stats.stats()
+
+    assert stats["open"] >= MIN_CONNECTIONS_COUNT
+    assert stats["waiting"] == 0
+
+
+@requires_mongo
+async def test_pool_stats_track_checked_out_connections(
+        connection: AsyncIOMotorDatabase,
+):
+    created = pool_stats.created
+
+    await connection.command("ping")
+
+    assert pool_stats.checked_out == 0
+    assert pool_stats.created >= created
+
+
+def test_filter_values_are_redacted():
+    assert _redact({
+        "first_name": "First",
+        "_id": {"$in": [ObjectId(), ObjectId()]},
+        "$or": [{"role": "dev"}, {"role": "admin"}, {"is_active": True}],
+    }) == {
+        "first_name": "?",
+        "_id": {"$in": "?"},
+        "$or": [{"role": "?"}, {"is_active": "?"}],
+    }
+
+
+def test_slow_command_is_recorded_with_its_filter_shape():
+    listener = CommandStatsListener(slow_threshold_ms=10, slow_log_size=5)
+    connection_id = ("localhost", 27017)
+
+    for request_id, duration_micros in ((1, 2000), (2, 20000)):
+        listener.started(monitoring.CommandStartedEvent(
+            {"find": "users", "filter": {"first_name": "First"}},
+            "db",
+            request_id,
+            connection_id,
+            request_id,
+        ))
+        listener.succeeded(monitoring.CommandSucceededEvent(
+            timedelta(microseconds=duration_micros),
+            {"ok": 1},
+            "find",
+            request_id,
+            connection_id,
+            request_id,
+        ))
+
+    stats = listener.stats()
+
+    assert stats["commands"][0]["collection"] == "users"
+    assert stats["commands"][0]["count"] == 2
+    assert len(stats["slow_operations"]) == 1
+    assert stats["slow_operations"][0]["filter"] == {"first_name": "?"}
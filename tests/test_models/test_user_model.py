@@ -1,7 +1,11 @@
+from datetime import datetime
+
 import pytest
 from bson import ObjectId
 from pydantic import ValidationError
 
+from app.api.responses import MongoJSONResponse
+from app.models.schemas.users import UserProfile
 from app.models.users import User
 
 
@@ -53,3 +57,58 @@ def test_last_name_validation():
             is_active=True,
             hashed_pass='test_pass'
         )
+
+
+def test_trusted_mongo_document_matches_validated_user():
+    document = {
+        '_id': ObjectId(),
+        'first_name': 'test',
+        'last_name': 'test',
+        'role': 'dev',
+        'is_active': True,
+        'created_at': datetime(2021, 1, 1),
+        'last_login': None,
+        'hashed_pass': 'test_pass',
+    }
+
+    assert User.from_mongo_trusted(document) == User(**document)
+
+
+def test_trusted_document_without_created_at_gets_a_default():
+    document = {
+        '_id': ObjectId(),
+        'first_name': 'test',
+        'last_name': 'test',
+        'role': 'dev',
+        'is_active': True,
+        'created_at': None,
+        'last_login': None,
+        'hashed_pass': 'test_pass',
+    }
+
+    user = User.from_mongo_trusted(document)
+    response = MongoJSONResponse(UserProfile.from_user(user))
+
+    assert isinstance(user.created_at, datetime)
+    assert user.last_login is None
+    assert user.version == 0
+    assert b'"created_at":null' not in response.body
+    assert UserProfile.parse_raw(response.body).created_at is not None
+
+
+def test_profile_from_user_excludes_password_hash():
+    user = User(
+        id=ObjectId(),
+        first_name='test',
+        last_name='test',
+        role='dev',
+        created_at=datetime(2021, 1, 1),
+        hashed_pass='test_pass'
+    )
+
+    profile = UserProfile.from_user(user, token='token')
+
+    assert profile == UserProfile(
+        **user.dict(exclude={'hashed_pass'}),
+        token='token',
+    )
@@ -1,9 +1,17 @@
+import asyncio
+
 import pytest
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 
-from app.db.repositories.users import UsersRepository
+from app.core import config
+from app.db.errors import EntityAlreadyExists, EntityDoesNotExist
+from app.db.repositories.users import (UsersRepository, principal_cache,
+                                       principal_lookups, user_loaders)
 from app.models.schemas.users import UserCreate, UserUpdate
+from app.models.users import User
 from app.services.security import verify_password
+from tests.utils import requires_mongo
 
 pytestmark = pytest.mark.asyncio
 
@@ -57,3 +65,186 @@ async def test_repository_update_user(
 
     assert updated_user.first_name == "Updated"
     assert updated_user.last_name == new_user.last_name
+
+
+async def test_repository_update_refreshes_cached_principal(
+        connection: AsyncIOMotorDatabase,
+        cleanup
+):
+    repo = UsersRepository(connection)
+
+    new_user = await repo.create_user(
+        UserCreate(
+            first_name="First",
+            last_name="Last",
+            role="dev",
+            password="test password"
+        )
+    )
+    await repo.get_principal_by_first_last_name("First", "Last")
+
+    await repo.update_by_fields(new_user, {'is_active': True})
+    principal = await repo.get_principal_by_first_last_name("First", "Last")
+
+    assert principal.is_active is True
+
+
+async def test_slow_principal_fetch_does_not_overwrite_an_update(
+        connection: AsyncIOMotorDatabase,
+        test_user: User,
+):
+    repo = UsersRepository(connection)
+    principal_cache.clear()
+    fetched = asyncio.Event()
+    proceed = asyncio.Event()
+
+    async def slow_fetch() -> User:
+        user = await repo.get_user_by_id(
+            str(test_user.id),
+            with_password=False,
+        )
+        fetched.set()
+        await proceed.wait()
+        return user
+
+    lookup = asyncio.ensure_future(
+        repo._lookup_principal(('id', str(test_user.id)), slow_fetch),
+    )
+    await fetched.wait()
+    await repo.update_by_fields(test_user, {'role': 'simple_mortal'})
+    proceed.set()
+
+    assert (await lookup).role == 'dev'
+    principal = await repo.get_principal_by_id(str(test_user.id))
+    assert principal.role == 'simple_mortal'
+
+
+async def test_repository_rejects_duplicate_names(
+        connection: AsyncIOMotorDatabase,
+        cleanup
+):
+    repo = UsersRepository(connection)
+
+    user = UserCreate(
+        first_name="First",
+        last_name="Last",
+        role="dev",
+        password="test password"
+    )
+    await repo.create_user(user)
+
+    with pytest.raises(EntityAlreadyExists):
+        await repo.create_user(user)
+
+
+async def test_repository_rejects_rename_onto_taken_name(
+        connection: AsyncIOMotorDatabase,
+        cleanup
+):
+    repo = UsersRepository(connection)
+
+    await repo.create_user(
+        UserCreate(
+            first_name="First",
+            last_name="Last",
+            role="dev",
+            password="test password"
+        )
+    )
+    other_user = await repo.create_user(
+        UserCreate(
+            first_name="Other",
+            last_name="Last",
+            role="dev",
+            password="test password"
+        )
+    )
+
+    with pytest.raises(EntityAlreadyExists):
+        await repo.update_user(other_user, UserUpdate(first_name="First"))
+
+
+async def test_repository_principal_lookup_skips_password_hash(
+        connection: AsyncIOMotorDatabase,
+        cleanup
+):
+    repo = UsersRepository(connection)
+
+    new_user = await repo.create_user(
+        UserCreate(
+            first_name="First",
+            last_name="Last",
+            role="dev",
+            password="test password"
+        )
+    )
+
+    user = await repo.get_user_by_id(str(new_user.id), with_password=False)
+
+    assert user.hashed_pass == ''
+    assert user.first_name == new_user.first_name
+
+
+async def test_repository_coalesces_concurrent_principal_lookups(
+        connection: AsyncIOMotorDatabase,
+        cleanup
+):
+    repo = UsersRepository(connection)
+    coalesced_before = principal_lookups.coalesced
+
+    results = await asyncio.gather(
+        *(
+            repo.get_principal_by_first_last_name("Missing", "User")
+            for _ in range(5)
+        ),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(error, EntityDoesNotExist) for error in results)
+    assert principal_lookups.coalesced - coalesced_before == 4
+
+
+async def test_repositories_of_a_motor_database_share_loaders():
+    # Motor databases are not hashable; creating the client does not
+    # connect, so this runs without a server
+    client = AsyncIOMotorClient(config.MONGO_URI)
+    database = client["loaders_{0}".format(ObjectId())]
+
+    try:
+        loader = UsersRepository(database)._get_loader('id', True)
+
+        assert UsersRepository(database)._get_loader('id', True) is loader
+    finally:
+        user_loaders.clear()
+        client.close()
+
+
+@requires_mongo
+async def test_repository_batches_concurrent_lookups_of_different_users(
+        connection: AsyncIOMotorDatabase,
+        test_user: User,
+        admin_user: User,
+):
+    repo = UsersRepository(connection)
+    id_loader = repo._get_loader('id', with_password=True)
+    name_loader = repo._get_loader('name', with_password=True)
+    id_stats = id_loader.stats()
+    name_stats = name_loader.stats()
+
+    by_id, by_name, missing = await asyncio.gather(
+        repo.get_user_by_id(str(test_user.id)),
+        repo.get_user_by_first_last_name(
+            admin_user.first_name,
+            admin_user.last_name,
+        ),
+        repo.get_user_by_id(str(ObjectId())),
+        return_exceptions=True,
+    )
+
+    assert by_id.id == test_user.id
+    assert by_name.id == admin_user.id
+    assert isinstance(missing, EntityDoesNotExist)
+    # both id lookups were answered by one query
+    assert id_loader.loads - id_stats["loads"] == 2
+    assert id_loader.batches - id_stats["batches"] == 1
+    assert name_loader.batches - name_stats["batches"] == 1
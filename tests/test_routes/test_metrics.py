@@ -0,0 +1,82 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from starlette.status import HTTP_200_OK, HTTP_403_FORBIDDEN
+
+from app.core import config
+from app.models.users import User
+from tests.utils import requires_mongo
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_login_reports_phase_timings(
+    app: FastAPI,
+    client: AsyncClient,
+    test_user: User,
+) -> None:
+    response = await client.post(
+        app.url_path_for("auth:login"),
+        json={
+            "user": {
+                "first_name": test_user.first_name,
+                "last_name": test_user.last_name,
+                "password": "Test Password",
+            },
+        },
+    )
+
+    assert response.status_code == HTTP_200_OK
+    phases = {
+        entry.split(";")[0].strip()
+        for entry in response.headers["Server-Timing"].split(",")
+    }
+    assert {"db", "password", "jwt", "encode", "total"} <= phases
+
+
+async def test_metrics_are_exposed_in_prometheus_format(
+    app: FastAPI,
+    client: AsyncClient,
+    test_user: User,
+) -> None:
+    await client.get(app.url_path_for("users:get-current-user"))
+
+    response = await client.get(app.url_path_for("metrics"))
+
+    assert response.status_code == HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    assert (
+        'http_request_duration_seconds_count{route="users:get-current-user",'
+        'method="GET",status="403"}'
+    ) in response.text
+    assert "principal_cache_hits" in response.text
+
+
+@requires_mongo
+async def test_admin_can_read_mongo_command_stats(
+    app: FastAPI,
+    authorized_admin_client: AsyncClient,
+    test_user: User,
+) -> None:
+    response = await authorized_admin_client.get(
+        app.url_path_for("admin:db-stats"),
+    )
+
+    assert response.status_code == HTTP_200_OK
+    stats = response.json()
+    assert stats["pool"]["open"] >= 1
+    assert any(
+        command["collection"] == config.MONGO_USERS_COLLECTION
+        for command in stats["commands"]
+    )
+
+
+async def test_user_can_not_read_mongo_command_stats(
+    app: FastAPI,
+    authorized_client: AsyncClient,
+) -> None:
+    response = await authorized_client.get(
+        app.url_path_for("admin:db-stats"),
+    )
+
+    assert response.status_code == HTTP_403_FORBIDDEN
@@ -6,6 +6,7 @@ from starlette.status import HTTP_201_CREATED, HTTP_400_BAD_REQUEST
 
 from app.db.repositories.users import UsersRepository
 from app.models.users import User
+from app.services.security import verify_password
 
 pytestmark = pytest.mark.asyncio
 
@@ -42,7 +43,7 @@ async def test_user_success_registration(
     assert user.first_name == first_name
     assert user.last_name == last_name
     assert user.role == role
-    assert user.check_password(password)
+    assert verify_password(password, user.hashed_pass)
 
 
 async def test_failed_user_registration_when_credentials_are_taken(
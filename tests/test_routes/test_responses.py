@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from app.api import responses
+from app.api.responses import MongoJSONResponse
+from app.models.schemas.users import UserProfile, UserWithToken
+
+
+@pytest.fixture(params=("orjson", "json"))
+def serializer(request, monkeypatch) -> str:
+    if request.param == "json":
+        monkeypatch.setattr(responses, "orjson", None)
+    elif responses.orjson is None:
+        pytest.skip("orjson is not installed")
+
+    return request.param
+
+
+@pytest.mark.parametrize(
+    "content",
+    (
+        UserProfile(
+            id=ObjectId(),
+            first_name="Ünïcödé",
+            last_name="Last",
+            role="dev",
+            is_active=True,
+            created_at=datetime(2021, 7, 1, 12, 30, 15, 123456),
+            token="token",
+        ),
+        UserWithToken(id=ObjectId(), token="token"),
+    ),
+)
+def test_fast_response_matches_default_encoding(
+    serializer: str,
+    content,
+) -> None:
+    expected = JSONResponse(jsonable_encoder(content)).body
+
+    assert MongoJSONResponse(content).body == expected
+
+
+def test_etag_changes_with_its_parts():
+    etag = responses.make_etag("id", 1)
+
+    assert etag.startswith('W/"')
+    assert etag == responses.make_etag("id", 1)
+    assert etag != responses.make_etag("id", 2)
+
+
+@pytest.mark.parametrize(
+    "if_none_match, matches",
+    (
+        (None, False),
+        ('W/"other"', False),
+        ('W/"tag"', True),
+        ('"tag"', True),
+        ('W/"other", W/"tag"', True),
+        ("*", True),
+    ),
+)
+def test_etag_matches_weakly(if_none_match, matches: bool):
+    assert responses.etag_matches(if_none_match, 'W/"tag"') is matches
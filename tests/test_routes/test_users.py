@@ -1,13 +1,19 @@
+import json
+
 import pytest
+from bson import ObjectId
 from fastapi import FastAPI
 from httpx import AsyncClient
 from motor.motor_asyncio import AsyncIOMotorClient
-from starlette.status import (HTTP_200_OK, HTTP_400_BAD_REQUEST,
-                              HTTP_403_FORBIDDEN)
+from starlette.status import (HTTP_200_OK, HTTP_304_NOT_MODIFIED,
+                              HTTP_400_BAD_REQUEST, HTTP_403_FORBIDDEN)
 
+from app.core import config
 from app.db.repositories.users import UsersRepository
 from app.models.schemas.users import UserProfile, UserWithToken
 from app.models.users import User
+from app.services import jwt
+from app.services.security import verify_password
 
 pytestmark = pytest.mark.asyncio
 
@@ -68,6 +74,35 @@ async def test_user_can_retrieve_own_profile(
     assert str(user_profile.id) == str(test_user.id)
 
 
+async def test_unchanged_profile_is_not_sent_again(
+    app: FastAPI,
+    authorized_client: AsyncClient,
+    test_user: User,
+) -> None:
+    url = app.url_path_for("users:get-current-user")
+
+    response = await authorized_client.get(url)
+    etag = response.headers["ETag"]
+
+    response = await authorized_client.get(
+        url,
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == HTTP_304_NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert not response.content
+
+    await authorized_client.put(url, json={"user": {"role": "admin"}})
+
+    response = await authorized_client.get(
+        url,
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == HTTP_200_OK
+    assert response.headers["ETag"] != etag
+    assert response.json()["role"] == "admin"
+
+
 async def test_user_can_change_password(
     app: FastAPI,
     authorized_client: AsyncClient,
@@ -88,7 +123,7 @@ async def test_user_can_change_password(
         last_name=user_profile.last_name,
     )
 
-    assert user.check_password("new_test_password")
+    assert verify_password("new_test_password", user.hashed_pass)
 
 
 async def test_user_can_change_first_name_if_not_taken(
@@ -131,6 +166,13 @@ async def test_user_can_activate_itself(
     user_profile = UserProfile(**response.json())
 
     assert user_profile.is_active is True
+    # the returned token already carries the new state
+    jwt_user = jwt.get_jwt_user_from_token(
+        user_profile.token,
+        str(config.SECRET_KEY),
+    )
+    assert jwt_user.is_active is True
+    assert jwt_user.version == test_user.version + 1
 
 
 async def test_user_can_deactivate_itself(
@@ -149,6 +191,13 @@ async def test_user_can_deactivate_itself(
     user_profile = UserProfile(**response.json())
 
     assert user_profile.is_active is False
+    # the returned token already carries the new state
+    jwt_user = jwt.get_jwt_user_from_token(
+        user_profile.token,
+        str(config.SECRET_KEY),
+    )
+    assert jwt_user.is_active is False
+    assert jwt_user.version == test_user.version + 1
 
 
 async def test_admin_can_update_other_user(
@@ -195,3 +244,174 @@ async def test_admin_can_not_update_other_user_password(
     )
 
     assert response.status_code == HTTP_400_BAD_REQUEST
+
+
+async def test_admin_can_page_through_users(
+    app: FastAPI,
+    authorized_admin_client: AsyncClient,
+    test_user: User,
+    admin_user: User,
+) -> None:
+    url = app.url_path_for("users:admin-list-users")
+
+    response = await authorized_admin_client.get(url, params={"limit": 1})
+    assert response.status_code == HTTP_200_OK
+    first_page = response.json()
+    assert len(first_page["users"]) == 1
+    assert "hashed_pass" not in first_page["users"][0]
+
+    response = await authorized_admin_client.get(
+        url,
+        params={"limit": 1, "cursor": first_page["next_cursor"]},
+    )
+    second_page = response.json()
+
+    assert len(second_page["users"]) == 1
+    assert second_page["next_cursor"] is None
+    assert {
+        first_page["users"][0]["id"],
+        second_page["users"][0]["id"],
+    } == {str(test_user.id), str(admin_user.id)}
+
+
+async def test_admin_can_filter_users_by_role(
+    app: FastAPI,
+    authorized_admin_client: AsyncClient,
+    test_user: User,
+    admin_user: User,
+) -> None:
+    response = await authorized_admin_client.get(
+        app.url_path_for("users:admin-list-users"),
+        params={"role": "dev", "is_active": False},
+    )
+
+    assert response.status_code == HTTP_200_OK
+    assert [user["id"] for user in response.json()["users"]] == [
+        str(test_user.id),
+    ]
+
+
+async def test_user_can_not_list_users(
+    app: FastAPI,
+    authorized_client: AsyncClient,
+    test_user: User,
+) -> None:
+    response = await authorized_client.get(
+        app.url_path_for("users:admin-list-users"),
+    )
+
+    assert response.status_code == HTTP_403_FORBIDDEN
+
+
+async def test_admin_can_export_users_as_ndjson(
+    app: FastAPI,
+    authorized_admin_client: AsyncClient,
+    test_user: User,
+    admin_user: User,
+) -> None:
+    response = await authorized_admin_client.get(
+        app.url_path_for("users:admin-export-users"),
+    )
+
+    assert response.status_code == HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert {row["id"] for row in rows} == {
+        str(test_user.id),
+        str(admin_user.id),
+    }
+    assert all("hashed_pass" not in row for row in rows)
+
+
+async def test_admin_can_export_users_as_csv(
+    app: FastAPI,
+    authorized_admin_client: AsyncClient,
+    test_user: User,
+    admin_user: User,
+) -> None:
+    response = await authorized_admin_client.get(
+        app.url_path_for("users:admin-export-users"),
+        params={"format": "csv"},
+    )
+
+    assert response.status_code == HTTP_200_OK
+
+    lines = response.text.splitlines()
+    assert lines[0].startswith("id,first_name,last_name")
+    assert len(lines) == 3
+
+
+async def test_admin_can_update_users_in_batch(
+    app: FastAPI,
+    authorized_admin_client: AsyncClient,
+    test_user: User,
+    admin_user: User,
+    connection: AsyncIOMotorClient,
+) -> None:
+    missing_id = str(ObjectId())
+
+    response = await authorized_admin_client.post(
+        app.url_path_for("users:admin-batch-update-users"),
+        json={
+            "users": [
+                {"id": str(test_user.id), "user": {"role": "admin"}},
+                {"id": str(admin_user.id), "user": {
+                    "first_name": test_user.first_name,
+                    "last_name": test_user.last_name,
+                }},
+                {"id": missing_id, "user": {"role": "dev"}},
+                {"id": "not an id", "user": {"role": "dev"}},
+                {"id": str(test_user.id), "user": {"password": "12312"}},
+                {"id": str(ObjectId()), "user": {"role": "root"}},
+                {"id": str(ObjectId()), "user": {"first_name": "a b"}},
+                {"id": str(ObjectId()), "user": {"last_name": "ab"}},
+            ],
+        },
+    )
+
+    assert response.status_code == HTTP_200_OK
+    assert [
+        (result["id"], result["status"])
+        for result in response.json()["results"]
+    ][:5] == [
+        (str(test_user.id), "updated"),
+        (str(admin_user.id), "conflict"),
+        (missing_id, "not_found"),
+        ("not an id", "invalid"),
+        (str(test_user.id), "invalid"),
+    ]
+    invalid_fields = response.json()["results"][5:]
+    assert [result["status"] for result in invalid_fields] == ["invalid"] * 3
+    assert [
+        result["detail"].split(":")[0] for result in invalid_fields
+    ] == ["role", "first_name", "last_name"]
+
+    users_repo = UsersRepository(connection)
+    updated_user = await users_repo.get_user_by_id(str(test_user.id))
+    assert updated_user.role == "admin"
+    unchanged_admin = await users_repo.get_user_by_id(str(admin_user.id))
+    assert unchanged_admin.first_name == admin_user.first_name
+
+
+async def test_demoted_admin_loses_listing_access_immediately(
+    app: FastAPI,
+    authorized_admin_client: AsyncClient,
+    admin_user: User,
+    connection: AsyncIOMotorClient,
+    monkeypatch,
+) -> None:
+    # the listing is authorized statefully even when tokens are trusted
+    monkeypatch.setattr(jwt, "STATELESS_AUTH_MAX_AGE_SECONDS", 60)
+    url = app.url_path_for("users:admin-list-users")
+
+    response = await authorized_admin_client.get(url)
+    assert response.status_code == HTTP_200_OK
+
+    await UsersRepository(connection).update_by_fields(
+        admin_user,
+        {"role": "dev"},
+    )
+
+    response = await authorized_admin_client.get(url)
+    assert response.status_code == HTTP_403_FORBIDDEN
@@ -0,0 +1,106 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.cli.import_users import run
+from app.db.indexes import UniqueIndexMissing
+from app.db.repositories.users import UsersRepository
+from app.models.users import User
+from app.services import security
+from app.services.importer import ImportProgress, UsersImporter
+from tests.utils import requires_mongo
+
+pytestmark = pytest.mark.asyncio
+
+
+def _record(first_name: str, password: str = "password") -> str:
+    return json.dumps({
+        "first_name": first_name,
+        "last_name": "Last",
+        "password": password,
+        "role": "dev",
+    })
+
+
+async def test_import_batch_reports_conflicts_and_invalid_records(
+        connection: AsyncIOMotorDatabase,
+        test_user: User,
+):
+    repo = UsersRepository(connection)
+    progress = ImportProgress()
+    records = [
+        (1, _record("Imported", password="imported password")),
+        (2, _record(test_user.first_name)),
+        (3, "{not json"),
+        (4, json.dumps({"first_name": "Missing"})),
+        (5, "\n"),
+    ]
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        failures = await UsersImporter(repo, executor, 2).import_batch(
+            records,
+            progress,
+        )
+
+    assert [line_number for line_number, _ in failures] == [2, 3, 4]
+    assert failures[0][1] == "user already exists"
+    assert progress.__dict__ == {
+        "line": 5,
+        "inserted": 1,
+        "conflicts": 1,
+        "invalid": 2,
+    }
+
+    imported = await repo.get_user_by_first_last_name("Imported", "Last")
+    assert not imported.is_active
+    assert imported.created_at is not None
+    assert security.verify_password(
+        "imported password",
+        imported.hashed_pass,
+    )
+
+
+def test_progress_survives_checkpoint(tmp_path):
+    checkpoint_path = str(tmp_path / "import.checkpoint")
+    assert ImportProgress.load(checkpoint_path).line == 0
+
+    ImportProgress(line=10, inserted=7, conflicts=2, invalid=1).save(
+        checkpoint_path,
+    )
+
+    assert ImportProgress.load(checkpoint_path).__dict__ == {
+        "line": 10,
+        "inserted": 7,
+        "conflicts": 2,
+        "invalid": 1,
+    }
+
+
+@requires_mongo
+async def test_import_refuses_to_run_without_the_unique_index(
+        connection: AsyncIOMotorDatabase,
+        cleanup,
+        tmp_path,
+):
+    collection = connection[UsersRepository.collection_name]
+    await collection.drop_index('first_name_last_name')
+    # duplicates keep the index from being built again
+    await collection.insert_many([
+        {'first_name': 'Twin', 'last_name': 'Last'},
+        {'first_name': 'Twin', 'last_name': 'Last'},
+    ])
+    source = tmp_path / "users.ndjson"
+    source.write_text(_record("Imported") + "\n")
+
+    with pytest.raises(UniqueIndexMissing):
+        await run(
+            str(source),
+            batch_size=10,
+            workers=1,
+            checkpoint_path=str(tmp_path / "users.checkpoint"),
+            report_path=str(tmp_path / "users.rejected"),
+        )
+
+    assert not await collection.count_documents({'first_name': 'Imported'})
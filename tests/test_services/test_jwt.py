@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta, timezone
+
+import jwt as jwt_lib
+import pytest
+from bson import ObjectId
+
+from app.models.users import User
+from app.services import jwt
+from app.services.revocation import revoked_versions
+
+SECRET_KEY = "secret"
+
+
+@pytest.fixture
+def user() -> User:
+    return User(
+        id=ObjectId(),
+        first_name="First",
+        last_name="Last",
+        role="dev",
+    )
+
+
+def test_decoded_token_is_served_from_cache(user: User):
+    token = jwt.create_access_token_for_user(user, SECRET_KEY)
+    hits = jwt.verified_tokens.hits
+
+    first = jwt.get_jwt_user_from_token(token, SECRET_KEY)
+    second = jwt.get_jwt_user_from_token(token, SECRET_KEY)
+
+    assert first.first_name == user.first_name
+    assert second is first
+    assert jwt.verified_tokens.hits == hits + 1
+
+
+def test_rejected_token_is_remembered(user: User):
+    token = jwt.create_access_token_for_user(user, "other secret")
+    hits = jwt.rejected_tokens.hits
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            jwt.get_jwt_user_from_token(token, SECRET_KEY)
+
+    assert jwt.rejected_tokens.hits == hits + 1
+
+
+def test_token_is_reused_until_identity_changes(user: User):
+    token = jwt.get_access_token_for_user(user, SECRET_KEY)
+
+    assert jwt.get_access_token_for_user(user, SECRET_KEY) == token
+
+    renamed = user.copy(update={"first_name": "Renamed"})
+
+    assert jwt.get_access_token_for_user(renamed, SECRET_KEY) != token
+
+
+def test_callers_token_is_reused_after_verification(user: User):
+    jwt.issued_tokens.clear()
+    token = jwt.create_access_token_for_user(user, SECRET_KEY)
+    jwt.verified_tokens.clear()
+
+    jwt.get_jwt_user_from_token(token, SECRET_KEY)
+
+    assert jwt.get_access_token_for_user(user, SECRET_KEY) == token
+
+
+def test_token_carries_user_id_as_subject(user: User):
+    token = jwt.create_access_token_for_user(user, SECRET_KEY)
+
+    jwt_user = jwt.get_jwt_user_from_token(token, SECRET_KEY)
+
+    assert jwt_user.id == user.id
+
+
+def test_legacy_token_is_resolved_by_name(user: User):
+    legacy_token = jwt_lib.encode(
+        {
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "exp": datetime.utcnow() + timedelta(minutes=5),
+            "sub": jwt.JWT_SUBJECT,
+        },
+        SECRET_KEY,
+        algorithm=jwt.ALGORITHM,
+    )
+
+    jwt_user = jwt.get_jwt_user_from_token(legacy_token, SECRET_KEY)
+
+    assert jwt_user.id is None
+    assert jwt_user.first_name == user.first_name
+
+
+@pytest.fixture
+def stateless_auth(monkeypatch) -> None:
+    monkeypatch.setattr(jwt, "STATELESS_AUTH_MAX_AGE_SECONDS", 60)
+
+
+def _decode_fresh(user: User):
+    token = jwt.create_access_token_for_user(user, SECRET_KEY)
+    return jwt.get_jwt_user_from_token(token, SECRET_KEY)
+
+
+def test_stateless_user_is_built_from_token_claims(
+        user: User,
+        stateless_auth: None,
+):
+    stateless_user = jwt.get_stateless_user(_decode_fresh(user))
+
+    assert stateless_user.id == user.id
+    assert stateless_user.role == user.role
+    assert stateless_user.version == user.version
+
+
+def test_stateless_user_is_not_trusted_when_disabled(user: User):
+    assert jwt.get_stateless_user(_decode_fresh(user)) is None
+
+
+def test_stateless_user_is_not_trusted_after_revocation(
+        user: User,
+        stateless_auth: None,
+):
+    jwt_user = _decode_fresh(user)
+
+    revoked_versions.revoke(user.id, user.version)
+
+    assert jwt.get_stateless_user(jwt_user) is None
+
+
+def test_old_token_is_not_trusted_statelessly(
+        user: User,
+        stateless_auth: None,
+):
+    jwt_user = _decode_fresh(user).copy(
+        update={"issued_at": datetime.now(timezone.utc) - timedelta(hours=1)},
+    )
+
+    assert jwt.get_stateless_user(jwt_user) is None
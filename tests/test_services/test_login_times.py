@@ -0,0 +1,76 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.db.repositories.users import UsersRepository
+from app.models.users import User
+from app.services.login_times import LastLoginWriter
+from app.services.users import update_login_time
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_login_times_are_written_on_flush(
+        connection: AsyncIOMotorDatabase,
+        test_user: User,
+):
+    repo = UsersRepository(connection)
+    writer = LastLoginWriter(repo, interval=60, batch_size=100)
+    login_time = datetime(2021, 7, 1, 12, 0)
+
+    writer.add(test_user.id, login_time)
+    assert (await repo.get_user_by_id(str(test_user.id))).last_login is None
+
+    await writer.flush()
+
+    user = await repo.get_user_by_id(str(test_user.id))
+    assert user.last_login == login_time
+    assert writer.stats() == {"pending": 0, "flushed": 1, "failed_flushes": 0}
+
+
+async def test_full_batch_is_flushed_without_waiting_for_interval(
+        connection: AsyncIOMotorDatabase,
+        test_user: User,
+):
+    repo = UsersRepository(connection)
+    writer = LastLoginWriter(repo, interval=60, batch_size=1)
+
+    writer.add(test_user.id, datetime(2021, 7, 1, 12, 0))
+    await writer.stop()
+
+    user = await repo.get_user_by_id(str(test_user.id))
+    assert user.last_login is not None
+    assert writer.pending == 0
+
+
+async def test_stop_flushes_pending_login_times(
+        connection: AsyncIOMotorDatabase,
+        test_user: User,
+):
+    repo = UsersRepository(connection)
+    writer = LastLoginWriter(repo, interval=60, batch_size=100)
+    writer.start()
+
+    writer.add(test_user.id, datetime(2021, 7, 1, 12, 0))
+    await asyncio.sleep(0)
+    await writer.stop()
+
+    user = await repo.get_user_by_id(str(test_user.id))
+    assert user.last_login is not None
+
+
+async def test_login_does_not_cache_the_user_it_read_before_an_update(
+        connection: AsyncIOMotorDatabase,
+        test_user: User,
+):
+    repo = UsersRepository(connection)
+    writer = LastLoginWriter(repo, interval=60, batch_size=100)
+    read_at_login = await repo.get_user_by_id(str(test_user.id))
+
+    await repo.update_by_fields(test_user, {'role': 'simple_mortal'})
+    update_login_time(read_at_login, writer)
+
+    principal = await repo.get_principal_by_id(str(test_user.id))
+    assert principal.role == 'simple_mortal'
@@ -0,0 +1,16 @@
+import pytest
+from bson import ObjectId
+
+from app.services.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    last_id = ObjectId()
+
+    assert decode_cursor(encode_cursor(last_id)) == last_id
+
+
+@pytest.mark.parametrize("cursor", ("", "not a cursor", "AAAA"))
+def test_malformed_cursor_is_rejected(cursor: str):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
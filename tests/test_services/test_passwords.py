@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services import passwords
+from app.services.passwords import HashingPoolOverloaded, PasswordHashingPool
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_password_hash_can_be_verified_through_pool():
+    hashed = await passwords.get_password_hash("test password")
+
+    assert await passwords.verify_password("test password", hashed)
+    assert not await passwords.verify_password("wrong password", hashed)
+
+
+async def test_pool_rejects_work_when_queue_is_full():
+    pool = PasswordHashingPool(
+        executor_kind="thread",
+        max_workers=1,
+        max_queue_size=1,
+    )
+    release = threading.Event()
+
+    running = [
+        asyncio.ensure_future(pool.run(release.wait)),
+        asyncio.ensure_future(pool.run(release.wait)),
+    ]
+    await asyncio.sleep(0)
+
+    with pytest.raises(HashingPoolOverloaded):
+        await pool.run(release.wait)
+
+    release.set()
+    await asyncio.gather(*running)
+    pool.shutdown()
+
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+    assert stats["max_queue_depth"] == 1
+    assert stats["in_flight"] == 0
+
+
+async def test_cancelled_request_keeps_its_slot_until_work_is_done():
+    pool = PasswordHashingPool(
+        executor_kind="thread",
+        max_workers=1,
+        max_queue_size=0,
+    )
+    release = threading.Event()
+
+    request = asyncio.ensure_future(pool.run(release.wait))
+    await asyncio.sleep(0)
+    request.cancel()
+    await asyncio.sleep(0)
+
+    # bcrypt is still running for the cancelled request
+    assert pool.stats()["in_flight"] == 1
+    with pytest.raises(HashingPoolOverloaded):
+        await pool.run(release.wait)
+
+    release.set()
+    await asyncio.sleep(0.1)
+    pool.shutdown()
+
+    assert pool.stats()["in_flight"] == 0
@@ -0,0 +1,33 @@
+from bson import ObjectId
+
+from app.services.revocation import RevokedVersions
+
+
+def test_revoked_version_is_reported():
+    revoked = RevokedVersions(capacity=100, error_rate=0.001, max_age=60)
+    user_id = ObjectId()
+
+    revoked.revoke(user_id, 3)
+
+    assert revoked.is_revoked(user_id, 3)
+    assert not revoked.is_revoked(user_id, 4)
+    assert not revoked.is_revoked(ObjectId(), 3)
+
+
+def test_revocation_outlives_one_rotation(monkeypatch):
+    revoked = RevokedVersions(capacity=100, error_rate=0.001, max_age=60)
+    user_id = ObjectId()
+    revoked.revoke(user_id, 1)
+
+    now = revoked._rotated_at  # noqa: WPS437
+    monkeypatch.setattr(
+        "app.services.revocation.time.monotonic",
+        lambda: now + 61,
+    )
+    assert revoked.is_revoked(user_id, 1)
+
+    monkeypatch.setattr(
+        "app.services.revocation.time.monotonic",
+        lambda: now + 122,
+    )
+    assert not revoked.is_revoked(user_id, 1)
@@ -3,8 +3,17 @@ from functools import wraps
 from typing import Any, Callable, Type
 
 import docker.errors
+import pytest
 from docker import APIClient
 
+from app.core import config
+
+# for tests of Mongo itself, skipped with STORAGE_BACKEND=memory
+requires_mongo = pytest.mark.skipif(
+    config.STORAGE_BACKEND == "memory",
+    reason="needs a Mongo server",
+)
+
 
 def do_with_retry(
     catching_exc: Type[Exception],